@@ -1,8 +1,12 @@
 """
 Django admin configuration for ProjectStore
 """
-from django.contrib import admin
+from collections import defaultdict
+
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from .analytics import record_orders
+from .inventory import InsufficientStock, OrderCancelled, apply_status_change
 from .models import (
     User, Category, Product, Order, OrderItem,
     Cart, CartItem, Review, StockMovement
@@ -74,6 +78,13 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('view_count', 'sales_count', 'rating', 'review_count')
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        """Edits write only the changed columns (stock counters and ratings move concurrently)"""
+        if change:
+            obj.save(update_fields=[*form.changed_data, 'updated_at'])
+        else:
+            super().save_model(request, obj, form, change)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -111,6 +122,44 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        """Status changes move stock and update the sales rollups"""
+        if not change or 'status' not in form.changed_data:
+            super().save_model(request, obj, form, change)
+            if not change:
+                record_orders([obj], None, obj.status)
+            return
+        
+        new_status = obj.status
+        obj.status = form.initial['status']
+        super().save_model(request, obj, form, change)
+        try:
+            apply_status_change(obj, new_status, request.user)
+        except InsufficientStock:
+            self.message_user(
+                request,
+                'Stock insuficiente: el estado de la orden no se cambió',
+                messages.ERROR
+            )
+        except OrderCancelled:
+            self.message_user(
+                request,
+                'Una orden cancelada no se puede reabrir: el estado no se cambió',
+                messages.ERROR
+            )
+    
+    def delete_model(self, request, obj):
+        record_orders([obj], obj.status, None)
+        super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        by_status = defaultdict(list)
+        for order in queryset.only('id', 'status', 'total', 'created_at'):
+            by_status[order.status].append(order)
+        for status, orders in by_status.items():
+            record_orders(orders, status, None)
+        super().delete_queryset(request, queryset)
 
 
 @admin.register(Review)
@@ -0,0 +1,233 @@
+"""
+Sales analytics for ProjectStore API
+
+Dashboards read two rollup tables instead of scanning orders:
+daily_sales_rollup (orders and revenue per day and status) and
+daily_product_sales (units and revenue per day and product). Both are
+kept current by applying deltas whenever an order is created, changes
+status or is deleted, so a query costs the same however many orders
+exist. rebuild_sales_rollup() recomputes them from scratch.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySalesRollup, Order, OrderItem
+
+
+# Statuses whose stock has been committed; these count as revenue
+REVENUE_STATUSES = ('confirmed', 'in_transit', 'delivered')
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+CENTS = Decimal('0.01')
+
+TOP_DEFAULT_LIMIT = 10
+TOP_MAX_LIMIT = 100
+
+UPSERT_STATUS_SQL = """
+    INSERT INTO daily_sales_rollup (id, date, status, order_count, revenue)
+    VALUES {values}
+    ON CONFLICT (date, status) DO UPDATE SET
+        order_count = daily_sales_rollup.order_count + EXCLUDED.order_count,
+        revenue = daily_sales_rollup.revenue + EXCLUDED.revenue
+"""
+
+UPSERT_PRODUCT_SQL = """
+    INSERT INTO daily_product_sales (id, date, product_id, category_id, quantity, revenue)
+    VALUES {values}
+    ON CONFLICT (date, product_id) DO UPDATE SET
+        quantity = daily_product_sales.quantity + EXCLUDED.quantity,
+        revenue = daily_product_sales.revenue + EXCLUDED.revenue
+"""
+
+REBUILD_STATUS_SQL = """
+    INSERT INTO daily_sales_rollup (id, date, status, order_count, revenue)
+    SELECT gen_random_uuid(), (created_at AT TIME ZONE %s)::date, status, COUNT(*), SUM(total)
+    FROM orders
+    GROUP BY 2, 3
+"""
+
+REBUILD_PRODUCT_SQL = """
+    INSERT INTO daily_product_sales (id, date, product_id, category_id, quantity, revenue)
+    SELECT gen_random_uuid(), (o.created_at AT TIME ZONE %s)::date, oi.product_id,
+        p.category_id, SUM(oi.quantity), SUM(oi.subtotal)
+    FROM order_items oi
+    JOIN orders o ON o.id = oi.order_id
+    JOIN products p ON p.id = oi.product_id
+    WHERE o.status = ANY(%s)
+    GROUP BY 2, 3, 4
+"""
+
+
+# ============================================
+# INCREMENTAL MAINTENANCE
+# ============================================
+
+def _order_date(order):
+    return timezone.localdate(order.created_at)
+
+
+def _upsert(sql, rows):
+    if not rows:
+        return
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(rows[0])) + ')'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(sql.replace('{values}', placeholders), [v for row in rows for v in row])
+
+
+def record_orders(orders, old_status, new_status):
+    """
+    Apply orders moving from old_status to new_status to the rollups
+    (old_status None for new orders, new_status None for deleted ones).
+    Run it in the transaction that changes the orders.
+    """
+    if not orders or old_status == new_status:
+        return
+
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for order in orders:
+        date = _order_date(order)
+        if old_status:
+            deltas[date, old_status][0] -= 1
+            deltas[date, old_status][1] -= order.total
+        if new_status:
+            deltas[date, new_status][0] += 1
+            deltas[date, new_status][1] += order.total
+    _upsert(UPSERT_STATUS_SQL, [
+        (uuid.uuid4(), date, status, count, revenue)
+        for (date, status), (count, revenue) in deltas.items()
+    ])
+
+    # Product sales only move when the orders start or stop counting as revenue
+    was_sale = old_status in REVENUE_STATUSES
+    is_sale = new_status in REVENUE_STATUSES
+    if was_sale != is_sale:
+        _record_product_sales(orders, 1 if is_sale else -1)
+
+
+def _record_product_sales(orders, sign):
+    dates = {order.pk: _order_date(order) for order in orders}
+    lines = OrderItem.objects.filter(
+        order__in=list(dates), product__isnull=False
+    ).values_list('order_id', 'product_id', 'product__category_id', 'quantity', 'subtotal')
+
+    sales = {}
+    for order_id, product_id, category_id, quantity, subtotal in lines:
+        key = (dates[order_id], product_id)
+        if key not in sales:
+            sales[key] = [category_id, 0, Decimal(0)]
+        sales[key][1] += sign * quantity
+        sales[key][2] += sign * subtotal
+    _upsert(UPSERT_PRODUCT_SQL, [
+        (uuid.uuid4(), date, product_id, category_id, quantity, revenue)
+        for (date, product_id), (category_id, quantity, revenue) in sales.items()
+    ])
+
+
+def rebuild_sales_rollup():
+    """
+    Recompute both rollups from orders. Writers wait on the table lock
+    and apply their deltas on top of the rebuilt rows.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('LOCK TABLE daily_sales_rollup, daily_product_sales IN EXCLUSIVE MODE')
+        cursor.execute('DELETE FROM daily_sales_rollup')
+        cursor.execute('DELETE FROM daily_product_sales')
+        cursor.execute(REBUILD_STATUS_SQL, [settings.TIME_ZONE])
+        days = cursor.rowcount
+        cursor.execute(REBUILD_PRODUCT_SQL, [settings.TIME_ZONE, list(REVENUE_STATUSES)])
+        return days, cursor.rowcount
+
+
+# ============================================
+# QUERIES
+# ============================================
+
+def _in_range(queryset, date_from=None, date_to=None):
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset
+
+
+def sales_summary(date_from=None, date_to=None):
+    """Revenue, order count, average order value and orders by status"""
+    rows = _in_range(DailySalesRollup.objects.all(), date_from, date_to).values(
+        'status'
+    ).annotate(orders=Sum('order_count'), revenue=Sum('revenue')).order_by()
+
+    by_status = {
+        status: {'orders': 0, 'revenue': Decimal(0)} for status, label in Order.STATUS_CHOICES
+    }
+    for row in rows:
+        by_status[row['status']] = {'orders': row['orders'], 'revenue': row['revenue']}
+
+    orders = sum(by_status[status]['orders'] for status in REVENUE_STATUSES)
+    revenue = sum(by_status[status]['revenue'] for status in REVENUE_STATUSES)
+    return {
+        'revenue': revenue,
+        'orders': orders,
+        'average_order_value': (revenue / orders).quantize(CENTS) if orders else Decimal(0),
+        'total_orders': sum(values['orders'] for values in by_status.values()),
+        'orders_by_status': by_status,
+    }
+
+
+def revenue_series(period='day', date_from=None, date_to=None):
+    """Revenue and order count per day, week or month"""
+    rows = _in_range(
+        DailySalesRollup.objects.filter(status__in=REVENUE_STATUSES), date_from, date_to
+    ).annotate(period=PERIODS[period]('date')).values('period').annotate(
+        orders=Sum('order_count'), revenue=Sum('revenue')
+    ).order_by('period')
+    return [
+        {'period': row['period'], 'orders': row['orders'], 'revenue': row['revenue']}
+        for row in rows
+    ]
+
+
+def top_products(limit=TOP_DEFAULT_LIMIT, order_by='quantity', date_from=None, date_to=None):
+    """Best-selling products by units or revenue"""
+    rows = _in_range(DailyProductSales.objects.all(), date_from, date_to).values(
+        'product_id', 'product__name', 'product__slug', 'product__image'
+    ).annotate(quantity=Sum('quantity'), revenue=Sum('revenue')).order_by(f'-{order_by}', 'product_id')
+    return [
+        {
+            'id': row['product_id'],
+            'name': row['product__name'],
+            'slug': row['product__slug'],
+            'image': row['product__image'],
+            'quantity': row['quantity'],
+            'revenue': row['revenue'],
+        }
+        for row in rows[:limit]
+    ]
+
+
+def top_categories(limit=TOP_DEFAULT_LIMIT, order_by='revenue', date_from=None, date_to=None):
+    """Best-selling categories by units or revenue"""
+    rows = _in_range(DailyProductSales.objects.all(), date_from, date_to).values(
+        'category_id', 'category__name', 'category__slug'
+    ).annotate(quantity=Sum('quantity'), revenue=Sum('revenue')).order_by(f'-{order_by}', 'category_id')
+    return [
+        {
+            'id': row['category_id'],
+            'name': row['category__name'],
+            'slug': row['category__slug'],
+            'quantity': row['quantity'],
+            'revenue': row['revenue'],
+        }
+        for row in rows[:limit]
+    ]
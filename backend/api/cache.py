@@ -0,0 +1,172 @@
+"""
+Caching helpers for ProjectStore API
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+
+# ============================================
+# VERSION KEYS
+# ============================================
+
+# Bumped whenever a product or category changes
+CATALOG_NAMESPACE = 'catalog'
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    """Current version of a cache namespace (shared across workers)"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted key never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every entry cached under a namespace"""
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+# ============================================
+# SINGLE-FLIGHT RESPONSE CACHE
+# ============================================
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+def request_signature(request):
+    """Stable hash of host, path and query params"""
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+    raw = repr((request.get_host(), request.path, params))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_or_compute(key, compute, timeout, version=None, stale_timeout=0):
+    """
+    Cached value for key, recomputed by compute() when missing, expired or
+    from an older version. Concurrent misses are collapsed: only the
+    request holding the lock recomputes. With stale_timeout, the others
+    are served the previous value meanwhile (stale-while-revalidate);
+    without it they wait for the fresh value.
+    """
+    entry = cache.get(key)
+    if _is_fresh(entry, version):
+        return entry['value']
+
+    lock_key = f'lock:{key}'
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, LOCK_TIMEOUT):
+        try:
+            return _store(key, compute(), timeout, version, stale_timeout)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    if entry is not None and stale_timeout:
+        return entry['value']
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if _is_fresh(entry, version):
+            return entry['value']
+        if cache.get(lock_key) is None:
+            break
+
+    # The lock holder failed or timed out
+    return _store(key, compute(), timeout, version, stale_timeout)
+
+
+def _is_fresh(entry, version):
+    return (
+        entry is not None and
+        entry['version'] == version and
+        entry['fresh_until'] > time.time()
+    )
+
+
+def _store(key, value, timeout, version, stale_timeout):
+    entry = {'value': value, 'version': version, 'fresh_until': time.time() + timeout}
+    cache.set(key, entry, timeout + stale_timeout)
+    return value
+
+
+def cached_catalog_response(name, request, get_response, timeout, stale_timeout=0):
+    """
+    Response of a catalog read endpoint, keyed by the catalog version.
+    Only the data and headers set by the view (e.g. X-Approximate-Count) are cached.
+    """
+    def compute():
+        response = get_response()
+        headers = {
+            header: value for header, value in response.items()
+            if header.lower().startswith('x-')
+        }
+        return response.data, headers
+
+    key = f'response:{name}:{request_signature(request)}'
+    data, headers = get_or_compute(
+        key, compute, timeout,
+        version=get_version(CATALOG_NAMESPACE),
+        stale_timeout=stale_timeout
+    )
+    return Response(data, headers=headers)
+
+
+# ============================================
+# IN-PROCESS LRU
+# ============================================
+
+class LRUCache:
+    """Thread-safe in-process LRU cache"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,339 @@
+"""
+Cart reads and bulk writes for ProjectStore API
+
+A cart is loaded with its items and their products in one query and
+serialized once per change: the payload is cached under the cart's
+updated_at (touched by every item mutation) and the catalog version
+(so price changes show up immediately).
+
+Read-modify-write mutations lock the cart row first, so concurrent
+requests on the same cart apply one after the other.
+
+Guests get no rows at all: their cart lives in the cache under the id
+sent in the X-Cart-Session header and is merged into the user's cart
+on login or registration. Its mutations hold a per-session cache lock
+around the read-modify-write, so concurrent taps never drop a change.
+
+Carts untouched past expires_at are deleted in small batches by
+delete_expired_carts() (reap_expired_carts command).
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from .cache import CATALOG_NAMESPACE, LOCK_POLL_INTERVAL, LOCK_TIMEOUT, get_version
+from .models import Cart, CartItem, Product
+from .serializers import CartSerializer
+
+
+CART_CACHE_TIMEOUT = 60 * 30
+
+# Same lifetime Cart.save() gives a new cart, counted from its last change
+CART_LIFETIME = timedelta(days=30)
+
+# Product columns the cart payload needs (final_price uses price and discount)
+CART_PRODUCT_FIELDS = ['name', 'image', 'price', 'discount']
+
+
+def cart_items_queryset():
+    """Cart items joined with the product columns the serializer reads"""
+    return CartItem.objects.select_related('product').only(
+        'id', 'cart_id', 'product_id', 'quantity', 'created_at',
+        *[f'product__{field}' for field in CART_PRODUCT_FIELDS]
+    ).order_by('created_at', 'id')
+
+
+def lock_cart(cart):
+    """Serialize writers of this cart until the transaction ends"""
+    list(Cart.objects.select_for_update().filter(pk=cart.pk).values_list('pk', flat=True))
+
+
+def touch_cart(cart):
+    """
+    Mark the cart as changed so its cached payload is not reused, and
+    push back its expiry (carts in use are never reaped)
+    """
+    cart.updated_at = timezone.now()
+    cart.expires_at = cart.updated_at + CART_LIFETIME
+    Cart.objects.filter(pk=cart.pk).update(
+        updated_at=cart.updated_at,
+        expires_at=cart.expires_at
+    )
+
+
+def serialize_cart(cart):
+    """Cart payload with line subtotals and total, from cache when unchanged"""
+    key = 'cart:{}:{}:{}'.format(
+        cart.pk, cart.updated_at.timestamp(), get_version(CATALOG_NAMESPACE)
+    )
+    data = cache.get(key)
+    if data is None:
+        prefetch_related_objects([cart], Prefetch('items', queryset=cart_items_queryset()))
+        data = CartSerializer(cart).data
+        cache.set(key, data, CART_CACHE_TIMEOUT)
+    return data
+
+
+# ============================================
+# WRITES
+# ============================================
+
+def add_to_cart(cart, product, quantity):
+    """Add quantity units of product, incrementing an existing line in SQL"""
+    with transaction.atomic():
+        lock_cart(cart)
+        cart_item, created = CartItem.objects.get_or_create(
+            cart=cart,
+            product=product,
+            defaults={'quantity': quantity}
+        )
+        if not created:
+            CartItem.objects.filter(pk=cart_item.pk).update(
+                quantity=F('quantity') + quantity,
+                updated_at=timezone.now()
+            )
+        touch_cart(cart)
+
+
+def set_item_quantity(cart, item_id, quantity):
+    """
+    Set a line's quantity (0 removes it) with one conditional write under
+    the cart lock; False if the line is not in the cart
+    """
+    with transaction.atomic():
+        lock_cart(cart)
+        items = CartItem.objects.filter(id=item_id, cart=cart)
+        if quantity <= 0:
+            changed, _ = items.delete()
+        else:
+            changed = items.update(quantity=quantity, updated_at=timezone.now())
+        if changed:
+            touch_cart(cart)
+    return bool(changed)
+
+
+def sync_cart(cart, lines, mode='replace'):
+    """
+    Apply {product_id: quantity} to the cart in one transaction.
+    'replace': lines is the whole cart (quantity 0 or absent removes the line).
+    'delta': quantities are added to the current ones (negative removes units).
+    """
+    with transaction.atomic():
+        lock_cart(cart)
+        if mode == 'delta':
+            current = dict(
+                CartItem.objects.filter(cart=cart, product_id__in=lines)
+                .values_list('product_id', 'quantity')
+            )
+            lines = {pk: current.get(pk, 0) + delta for pk, delta in lines.items()}
+
+        keep = {pk: quantity for pk, quantity in lines.items() if quantity > 0}
+        if mode == 'delta':
+            removed = CartItem.objects.filter(
+                cart=cart, product_id__in=[pk for pk in lines if pk not in keep]
+            )
+        else:
+            removed = CartItem.objects.filter(cart=cart).exclude(product_id__in=keep)
+        removed.delete()
+
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product_id=pk, quantity=quantity) for pk, quantity in keep.items()],
+            update_conflicts=True,
+            unique_fields=['cart', 'product'],
+            update_fields=['quantity', 'updated_at']
+        )
+        touch_cart(cart)
+
+
+# ============================================
+# EXPIRED CARTS
+# ============================================
+
+# One statement per batch: lock a slice of expired carts through the
+# expires_at index (skipping rows a request is using), delete their
+# items, then the carts
+DELETE_EXPIRED_SQL = """
+    WITH batch AS (
+        SELECT id FROM carts
+        WHERE expires_at < %s
+        ORDER BY expires_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ),
+    deleted_items AS (
+        DELETE FROM cart_items USING batch
+        WHERE cart_items.cart_id = batch.id
+        RETURNING cart_items.id
+    ),
+    deleted_carts AS (
+        DELETE FROM carts USING batch
+        WHERE carts.id = batch.id
+        RETURNING carts.id
+    )
+    SELECT (SELECT COUNT(*) FROM deleted_carts), (SELECT COUNT(*) FROM deleted_items)
+"""
+
+
+def delete_expired_carts(batch_size=1000):
+    """
+    Delete up to batch_size expired carts with their items in one short
+    transaction. Returns (carts deleted, items deleted).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(DELETE_EXPIRED_SQL, [timezone.now(), batch_size])
+        return cursor.fetchone()
+
+
+# ============================================
+# GUEST CARTS
+# ============================================
+
+GUEST_CART_HEADER = 'X-Cart-Session'
+
+
+def parse_item_id(value):
+    """Cart item id (a product UUID for guests), or None if malformed"""
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+class GuestCart:
+    """
+    Anonymous cart stored in the cache as {product_id: quantity}; it
+    expires GUEST_CART_DAYS after its last change. An unknown or invalid
+    session id starts a new, empty cart.
+    """
+
+    def __init__(self, session_id=None):
+        try:
+            self.session_id = uuid.UUID(str(session_id))
+        except ValueError:
+            self.session_id = uuid.uuid4()
+        self._load()
+
+    @property
+    def key(self):
+        return f'guest-cart:{self.session_id}'
+
+    @property
+    def lines(self):
+        return self._state['lines']
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold the session's lock and work on its latest state, so
+        concurrent read-modify-writes apply one after the other. A lock
+        left by a crashed request expires after LOCK_TIMEOUT.
+        """
+        lock_key = f'lock:{self.key}'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock_key, token, LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            self._load()
+            yield
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    def add(self, product_id, quantity):
+        with self.locked():
+            self.lines[product_id] = self.lines.get(product_id, 0) + quantity
+            self._save()
+
+    def update(self, product_id, quantity):
+        """Set a line's quantity (0 or less removes it); False if not in the cart"""
+        with self.locked():
+            if product_id not in self.lines:
+                return False
+            if quantity <= 0:
+                del self.lines[product_id]
+            else:
+                self.lines[product_id] = quantity
+            self._save()
+            return True
+
+    def remove(self, product_id):
+        """Drop a line; False if not in the cart"""
+        with self.locked():
+            if self.lines.pop(product_id, None) is None:
+                return False
+            self._save()
+            return True
+
+    def clear(self):
+        with self.locked():
+            self.lines.clear()
+            self._save()
+
+    def sync(self, lines, mode='replace'):
+        """Same semantics as sync_cart()"""
+        with self.locked():
+            if mode == 'delta':
+                lines = {pk: self.lines.get(pk, 0) + delta for pk, delta in lines.items()}
+                merged = {**self.lines, **lines}
+            else:
+                merged = lines
+            self._state['lines'] = {pk: quantity for pk, quantity in merged.items() if quantity > 0}
+            self._save()
+
+    def delete(self):
+        cache.delete(self.key)
+
+    def serialize(self):
+        """Same payload as a user cart; item ids are the product ids"""
+        products = Product.objects.only('id', *CART_PRODUCT_FIELDS).in_bulk(list(self.lines))
+        cart = Cart(
+            id=self.session_id,
+            session_id=str(self.session_id),
+            expires_at=self._state.get('expires_at') or self._expires_at()
+        )
+        cart.created_at = self._state['created_at']
+        # Unsaved cart: hand the serializer its items directly
+        cart._prefetched_objects_cache = {'items': [
+            CartItem(id=pk, cart=cart, product=products[pk], quantity=quantity)
+            for pk, quantity in self.lines.items() if pk in products
+        ]}
+        return CartSerializer(cart).data
+
+    def _load(self):
+        self._state = cache.get(self.key) or {'created_at': timezone.now(), 'lines': {}}
+
+    def _expires_at(self):
+        return timezone.now() + timedelta(days=settings.GUEST_CART_DAYS)
+
+    def _save(self):
+        self._state['expires_at'] = self._expires_at()
+        cache.set(self.key, self._state, timeout=settings.GUEST_CART_DAYS * 24 * 60 * 60)
+
+
+def merge_guest_cart(user, session_id):
+    """Add a guest cart's lines to the user's active cart in one upsert"""
+    if not session_id:
+        return
+    guest = GuestCart(session_id)
+    if not guest.lines:
+        return
+    # Locked, so a change made while logging in is merged, not dropped
+    with guest.locked():
+        available = set(
+            Product.objects.filter(id__in=list(guest.lines), active=True).values_list('id', flat=True)
+        )
+        lines = {pk: quantity for pk, quantity in guest.lines.items() if pk in available}
+        if lines:
+            cart, created = Cart.objects.get_or_create(user=user, is_active=True)
+            sync_cart(cart, lines, mode='delta')
+        guest.delete()
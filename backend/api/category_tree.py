@@ -0,0 +1,74 @@
+"""
+Cached category tree for ProjectStore API
+"""
+from django.core.cache import cache
+
+from .cache import get_version
+from .models import Category
+
+
+CATEGORY_TREE_NAMESPACE = 'category-tree'
+CATEGORY_TREE_TIMEOUT = 60 * 60 * 24
+
+# Same fields as CategorySerializer
+CATEGORY_FIELDS = [
+    'id', 'name', 'slug', 'description', 'image_url',
+    'parent', 'display_order', 'is_active'
+]
+
+
+def build_category_tree():
+    """
+    Load every active category in one query and link them in memory.
+    Returns (roots, nodes_by_slug); children of inactive parents are hidden.
+    """
+    rows = Category.objects.filter(is_active=True).order_by(
+        'display_order', 'name'
+    ).values(*CATEGORY_FIELDS)
+
+    nodes_by_id = {}
+    for row in rows:
+        node = dict(row, id=str(row['id']), children=[])
+        node['parent'] = str(row['parent']) if row['parent'] else None
+        nodes_by_id[node['id']] = node
+
+    roots = []
+    for node in nodes_by_id.values():
+        if node['parent'] is None:
+            roots.append(node)
+        elif node['parent'] in nodes_by_id:
+            nodes_by_id[node['parent']]['children'].append(node)
+
+    # Only nodes reachable from a root are visible
+    nodes_by_slug = {}
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        nodes_by_slug[node['slug']] = node
+        stack.extend(node['children'])
+
+    return roots, nodes_by_slug
+
+
+def _get_cached_tree():
+    key = f'category-tree:{get_version(CATEGORY_TREE_NAMESPACE)}'
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(key, tree, CATEGORY_TREE_TIMEOUT)
+    return tree
+
+
+def get_category_tree():
+    """Root categories with nested children"""
+    return _get_cached_tree()[0]
+
+
+def get_category_index():
+    """Mapping of slug to category node (with nested children)"""
+    return _get_cached_tree()[1]
+
+
+def get_category_subtree(slug):
+    """Category node for a slug, or None if missing or hidden"""
+    return get_category_index().get(slug)
@@ -0,0 +1,54 @@
+"""
+Conditional GET (ETag / Last-Modified) helpers for ProjectStore API
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag from the values that identify a representation"""
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional_response(request, get_response, etag, last_modified=None, private=False):
+    """
+    304 Not Modified when the client's If-None-Match / If-Modified-Since
+    still match, without calling get_response(); otherwise the full
+    response with ETag and Last-Modified set
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = get_response()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Let clients keep the body but revalidate on every use
+    if private:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True, public=True)
+    return response
+
+
+def get_last_modified(queryset, related=(), **lookup):
+    """
+    (pk, updated_at) of a single row, or None if it does not exist.
+    With related (forward relations whose data the representation
+    includes), updated_at is the latest of the row's and theirs.
+    """
+    columns = ['updated_at', *[f'{relation}__updated_at' for relation in related]]
+    try:
+        row = queryset.filter(**lookup).values_list('pk', *columns).first()
+    except (ValueError, TypeError, ValidationError):
+        return None
+    if row is None:
+        return None
+    return row[0], max((value for value in row[1:] if value is not None), default=None)
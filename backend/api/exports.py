@@ -0,0 +1,157 @@
+"""
+Streaming data exports for ProjectStore API
+
+Orders, order items and stock movements are read through a server-side
+cursor (QuerySet.iterator) as plain tuples (values_list) and written out
+chunk by chunk as CSV or JSON lines, so memory use stays flat however
+many rows are exported.
+"""
+import csv
+import io
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Order, OrderItem, StockMovement
+
+
+# Rows fetched from the cursor (and written to the response) at a time
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Export:
+    """A dataset: model, (column, lookup) pairs and the fields filters apply to"""
+
+    def __init__(self, model, columns, date_field, status_field=None, type_field=None):
+        self.model = model
+        self.columns = columns
+        self.date_field = date_field
+        self.status_field = status_field
+        self.type_field = type_field
+
+    def queryset(self, date_from=None, date_to=None, statuses=None, types=None):
+        queryset = self.model.objects.all()
+        # Day boundaries in local time keep the range on the created_at index
+        if date_from:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': _start_of_day(date_from)})
+        if date_to:
+            queryset = queryset.filter(
+                **{f'{self.date_field}__lt': _start_of_day(date_to + timedelta(days=1))}
+            )
+        if statuses and self.status_field:
+            queryset = queryset.filter(**{f'{self.status_field}__in': statuses})
+        if types and self.type_field:
+            queryset = queryset.filter(**{f'{self.type_field}__in': types})
+        return queryset.order_by(self.date_field, 'id').values_list(
+            *[lookup for column, lookup in self.columns]
+        )
+
+
+EXPORTS = {
+    'orders': Export(Order, [
+        ('id', 'id'),
+        ('order_number', 'order_number'),
+        ('created_at', 'created_at'),
+        ('status', 'status'),
+        ('user_email', 'user__email'),
+        ('customer_name', 'customer_name'),
+        ('customer_email', 'customer_email'),
+        ('customer_phone', 'customer_phone'),
+        ('customer_address', 'customer_address'),
+        ('delivery_method', 'delivery_method'),
+        ('subtotal', 'subtotal'),
+        ('discount', 'discount'),
+        ('total', 'total'),
+    ], date_field='created_at', status_field='status'),
+    # Filtered by the order's date and status, so it lines up with the orders export
+    'order-items': Export(OrderItem, [
+        ('id', 'id'),
+        ('order_id', 'order_id'),
+        ('order_number', 'order__order_number'),
+        ('order_created_at', 'order__created_at'),
+        ('order_status', 'order__status'),
+        ('product_id', 'product_id'),
+        ('product_sku', 'product__sku'),
+        ('product_name', 'product_name'),
+        ('price', 'price'),
+        ('quantity', 'quantity'),
+        ('subtotal', 'subtotal'),
+    ], date_field='order__created_at', status_field='order__status'),
+    'stock-movements': Export(StockMovement, [
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('product_id', 'product_id'),
+        ('product_sku', 'product__sku'),
+        ('product_name', 'product__name'),
+        ('type', 'type'),
+        ('quantity', 'quantity'),
+        ('previous_stock', 'previous_stock'),
+        ('new_stock', 'new_stock'),
+        ('reference_type', 'reference_type'),
+        ('reference_id', 'reference_id'),
+        ('reason', 'reason'),
+        ('created_by', 'created_by__email'),
+    ], date_field='created_at', type_field='type'),
+}
+
+
+def _start_of_day(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _chunks(queryset):
+    chunk = []
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_csv(export, queryset):
+    """Header line, then one chunk of CSV text per EXPORT_CHUNK_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column for column, lookup in export.columns])
+    yield buffer.getvalue()
+    for chunk in _chunks(queryset):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def stream_jsonl(export, queryset):
+    """One JSON object per row, EXPORT_CHUNK_SIZE rows per chunk"""
+    columns = [column for column, lookup in export.columns]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in _chunks(queryset):
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in chunk)
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
+
+
+def export_rows(name, output='csv', **filters):
+    """(content chunks, content type) for an export and its filters"""
+    export = EXPORTS[name]
+    return STREAMS[output](export, export.queryset(**filters)), CONTENT_TYPES[output]
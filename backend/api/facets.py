@@ -0,0 +1,132 @@
+"""
+Faceted catalog counts for ProjectStore API
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, CharField, Value, When
+
+from .cache import CATALOG_NAMESPACE, get_version
+from .sparse_fields import FIELDS_PARAM, OMIT_PARAM
+
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+
+# Half-open [min, max) ranges, same as the price filter in ProductCatalog.tsx
+PRICE_BUCKETS = [
+    ('low', None, 300),
+    ('mid', 300, 1000),
+    ('high', 1000, None),
+]
+
+# Built from PRICE_BUCKETS so the counts always match the min/max sent to clients
+PRICE_BUCKET = Case(
+    *[
+        When(price__lt=high, then=Value(bucket))
+        for bucket, low, high in PRICE_BUCKETS if high is not None
+    ],
+    default=Value(PRICE_BUCKETS[-1][0]),
+    output_field=CharField(),
+)
+
+# Attribute facets that are plain product columns
+ATTRIBUTE_FACETS = ['brand', 'color', 'size', 'material']
+
+# Query params that do not change the filtered set
+IGNORED_PARAMS = {
+    'page', 'page_size', 'cursor', 'pagination', 'ordering', 'format',
+    FIELDS_PARAM, OMIT_PARAM
+}
+
+FACETS_SQL = """
+    SELECT
+        CASE
+            WHEN GROUPING(f.category_id) = 0 THEN 'category'
+            WHEN GROUPING(f.brand) = 0 THEN 'brand'
+            WHEN GROUPING(f.color) = 0 THEN 'color'
+            WHEN GROUPING(f.size) = 0 THEN 'size'
+            WHEN GROUPING(f.material) = 0 THEN 'material'
+            WHEN GROUPING(f.price_bucket) = 0 THEN 'price'
+            ELSE 'total'
+        END AS facet,
+        COALESCE(
+            f.category_id::text, f.brand, f.color, f.size, f.material, f.price_bucket
+        ) AS value,
+        c.name,
+        c.slug,
+        COUNT(*)
+    FROM ({inner}) AS f
+    LEFT JOIN categories c ON c.id = f.category_id
+    GROUP BY GROUPING SETS (
+        (f.category_id, c.name, c.slug),
+        (f.brand),
+        (f.color),
+        (f.size),
+        (f.material),
+        (f.price_bucket),
+        ()
+    )
+"""
+
+
+def facet_signature(query_params):
+    """Stable hash of the filter params that define the product set"""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        if key not in IGNORED_PARAMS
+        for value in query_params.getlist(key)
+    )
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+def compute_facets(queryset):
+    """
+    Count products per category, attribute and price bucket with a single
+    GROUPING SETS query over the filtered queryset
+    """
+    inner = queryset.order_by().annotate(price_bucket=PRICE_BUCKET).values_list(
+        'category_id', *ATTRIBUTE_FACETS, 'price_bucket'
+    )
+    inner_sql, params = inner.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL.format(inner=inner_sql), params)
+        rows = cursor.fetchall()
+
+    facets = {'count': 0, 'category': []}
+    facets.update({name: [] for name in ATTRIBUTE_FACETS})
+    price_counts = {}
+
+    for facet, value, category_name, category_slug, count in rows:
+        if facet == 'total':
+            facets['count'] = count
+        elif facet == 'category':
+            facets['category'].append({
+                'id': value, 'name': category_name, 'slug': category_slug, 'count': count
+            })
+        elif facet == 'price':
+            price_counts[value] = count
+        elif value:
+            # Products without the attribute are not a selectable facet value
+            facets[facet].append({'value': value, 'count': count})
+
+    for name in ['category', *ATTRIBUTE_FACETS]:
+        facets[name].sort(key=lambda entry: -entry['count'])
+
+    facets['price'] = [
+        {'value': bucket, 'min': low, 'max': high, 'count': price_counts.get(bucket, 0)}
+        for bucket, low, high in PRICE_BUCKETS
+    ]
+    return facets
+
+
+def get_facets(queryset, query_params):
+    """Facet counts for a filtered queryset, cached per filter signature"""
+    key = f'product-facets:{get_version(CATALOG_NAMESPACE)}:{facet_signature(query_params)}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,198 @@
+"""
+Fast read-only list serialization for ProjectStore API
+
+A FastListSerializer mirrors a ModelSerializer for list endpoints.
+Rows are fetched with .values() (related names and computed columns
+come straight from SQL) and each field is converted by a function
+picked once from the serializer's own field definitions. The output
+is the same JSON the ModelSerializer renders, without per-row field
+binding, source traversal or model instances. Every value is already
+a JSON type, so the C encoder never calls back into Python.
+"""
+import copy
+import decimal
+from datetime import datetime
+
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .serializers import OrderListSerializer, ProductListSerializer, StockMovementSerializer
+
+
+def _decimal_converter(field):
+    """Same rounding and formatting as DecimalField.to_representation"""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.localize or not coerce_to_string:
+        return field.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+    return convert
+
+
+def _datetime_converter(field):
+    """
+    Same as DateTimeField.to_representation for ISO 8601 output. The
+    current timezone can change per request, so it is resolved once per
+    serialize() call (see bind_converters)
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, 'timezone'):
+        return field.to_representation
+
+    def bind():
+        field_timezone = field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if not isinstance(value, datetime) or value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+    bind.per_call = True
+    return bind
+
+
+def _pk_converter(field):
+    # The renderer would turn the pk into a string anyway
+    if field.pk_field is not None:
+        return field.pk_field.to_representation
+    return str
+
+
+# Fields whose to_representation is a plain type conversion
+SIMPLE_CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+}
+
+
+def converter_for(field):
+    """Function turning a raw column value into the field's representation"""
+    to_representation = type(field).to_representation
+    if to_representation in SIMPLE_CONVERTERS:
+        return SIMPLE_CONVERTERS[to_representation]
+    if isinstance(field, serializers.BooleanField):
+        return bool
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+    if isinstance(field, PrimaryKeyRelatedField):
+        return _pk_converter(field)
+    return field.to_representation
+
+
+class FastListSerializer:
+    """
+    Read-only twin of a ModelSerializer for lists. annotations provide
+    fields that are model properties (computed in SQL instead).
+    """
+
+    def __init__(self, serializer_class, **annotations):
+        self.annotations = annotations
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            lookup = field.source.replace('.', '__')
+            self.fields.append((name, lookup, converter_for(field)))
+        self.lookups = [lookup for name, lookup, convert in self.fields]
+
+    @property
+    def names(self):
+        return [name for name, lookup, convert in self.fields]
+
+    def only(self, names):
+        """Copy rendering only names (a sparse fieldset); None keeps every field"""
+        if names is None:
+            return self
+        narrowed = copy.copy(self)
+        narrowed.fields = [field for field in self.fields if field[0] in names]
+        narrowed.lookups = [lookup for name, lookup, convert in narrowed.fields]
+        narrowed.annotations = {
+            name: expression for name, expression in self.annotations.items()
+            if name in narrowed.lookups
+        }
+        return narrowed
+
+    def values(self, queryset, extra=()):
+        """
+        The queryset as dicts with the columns the fields need, plus
+        extra ones (e.g. ordering keys for cursor pagination)
+        """
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values(*dict.fromkeys([*self.lookups, *extra]))
+
+    def bind_converters(self):
+        return [
+            (name, lookup, convert() if getattr(convert, 'per_call', False) else convert)
+            for name, lookup, convert in self.fields
+        ]
+
+    def serialize(self, rows):
+        fields = self.bind_converters()
+        return [
+            {
+                name: None if (value := row[lookup]) is None else convert(value)
+                for name, lookup, convert in fields
+            }
+            for row in rows
+        ]
+
+
+# Same value as Product.final_price; rounded by the serializer field, not SQL
+FINAL_PRICE = Case(
+    When(discount__gt=0, then=ExpressionWrapper(
+        F('price') * (Value(1) - F('discount') / Value(100)),
+        output_field=DecimalField()
+    )),
+    default=F('price'),
+    output_field=DecimalField(),
+)
+
+PRODUCT_LIST = FastListSerializer(ProductListSerializer, final_price=FINAL_PRICE)
+ORDER_LIST = FastListSerializer(OrderListSerializer)
+STOCK_MOVEMENT_LIST = FastListSerializer(StockMovementSerializer)
+
+
+def ordering_keys(view, queryset):
+    """Columns a page may be ordered and positioned (cursor pagination) by"""
+    keys = list(queryset.query.order_by)
+    ordering_fields = getattr(view, 'ordering_fields', None)
+    if isinstance(ordering_fields, (list, tuple)):
+        keys += ordering_fields
+    keys += getattr(getattr(view.paginator, 'cursor', None), 'ordering', ())
+    return [key.lstrip('-') for key in keys if isinstance(key, str)]
+
+
+def fast_list_response(view, fast_serializer):
+    """
+    What ListModelMixin.list() returns (paginated or not), built with
+    a FastListSerializer
+    """
+    queryset = view.filter_queryset(view.get_queryset())
+    rows = fast_serializer.values(queryset, ordering_keys(view, queryset))
+    page = view.paginate_queryset(rows)
+    if page is not None:
+        return view.get_paginated_response(fast_serializer.serialize(page))
+    return Response(fast_serializer.serialize(rows))
@@ -0,0 +1,225 @@
+"""
+Stock reservation engine for ProjectStore API
+
+Checkout reserves units (products.reserved_stock) with one conditional
+UPDATE for all lines; confirming turns the reservation into a sale,
+cancelling releases it or returns the stock. Stock movements are written
+in bulk and the log_stock_movement() trigger is skipped for these
+updates so nothing is logged twice.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .analytics import record_orders
+from .models import Order, OrderItem, StockMovement
+
+
+class InsufficientStock(Exception):
+    """Raised when some lines cannot be reserved"""
+
+    def __init__(self, product_ids):
+        self.product_ids = product_ids
+        super().__init__(f'Insufficient stock for {len(product_ids)} product(s)')
+
+
+class OrderCancelled(Exception):
+    """Raised when a cancelled order would be moved to another status"""
+
+
+# Locks the product rows in id order (no deadlocks between concurrent
+# checkouts) and only touches rows that still have enough units
+RESERVE_SQL = """
+    WITH locked AS (
+        SELECT id FROM products WHERE id = ANY(%s::uuid[]) ORDER BY id FOR UPDATE
+    )
+    UPDATE products AS p
+    SET reserved_stock = p.reserved_stock + v.quantity
+    FROM (VALUES {values}) AS v(id, quantity), locked
+    WHERE p.id = v.id AND locked.id = p.id AND p.stock - p.reserved_stock >= v.quantity
+    RETURNING p.id
+"""
+
+ADJUST_SQL = """
+    WITH locked AS (
+        SELECT id FROM products WHERE id = ANY(%s::uuid[]) ORDER BY id FOR UPDATE
+    )
+    UPDATE products AS p
+    SET stock = p.stock + ({stock_factor}) * v.quantity,
+        reserved_stock = p.reserved_stock + ({reserved_factor}) * v.quantity
+    FROM (VALUES {values}) AS v(id, quantity), locked
+    WHERE p.id = v.id AND locked.id = p.id {condition}
+    RETURNING p.id, p.stock
+"""
+
+
+def reservation_deadline():
+    """When a reservation made now expires"""
+    return timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+
+
+def order_lines(orders):
+    """{product_id: quantity} for one or more orders, in one query"""
+    if isinstance(orders, Order):
+        orders = [orders]
+    lines = defaultdict(int)
+    items = OrderItem.objects.filter(
+        order__in=orders, product__isnull=False
+    ).values_list('product_id', 'quantity')
+    for product_id, quantity in items:
+        lines[product_id] += quantity
+    return dict(lines)
+
+
+def _execute(sql, lines):
+    values = ', '.join(['(%s::uuid, %s::integer)'] * len(lines))
+    params = [[str(pk) for pk in lines]]
+    params += [value for pk, quantity in lines.items() for value in (str(pk), quantity)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql.replace('{values}', values), params)
+        return cursor.fetchall()
+
+
+def _adjust(lines, stock_factor, reserved_factor, condition=''):
+    """Add factor * quantity to stock and reserved_stock for every line"""
+    sql = ADJUST_SQL.format(
+        stock_factor=int(stock_factor),
+        reserved_factor=int(reserved_factor),
+        condition=condition,
+        values='{values}'
+    )
+    with connection.cursor() as cursor:
+        # Movements are recorded here, not by the log_stock_movement() trigger
+        cursor.execute("SET LOCAL projectstore.skip_stock_log = 'on'")
+    return _execute(sql, lines)
+
+
+def _record_movements(order, lines, rows, movement_type, user=None):
+    """Bulk insert one movement per product from the RETURNING rows"""
+    sign = -1 if movement_type == 'sale' else 1
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=product_id,
+            type=movement_type,
+            quantity=sign * lines[product_id],
+            previous_stock=new_stock - sign * lines[product_id],
+            new_stock=new_stock,
+            reference_id=order.id,
+            reference_type='order',
+            reason=f'Orden {order.order_number}',
+            created_by=user if user and user.is_authenticated else None,
+        )
+        for product_id, new_stock in rows
+    ])
+
+
+# ============================================
+# RESERVATION LIFECYCLE
+# ============================================
+
+def reserve_stock(lines):
+    """
+    Reserve every line or none of them (must run inside a transaction).
+    Raises InsufficientStock with the products that could not be reserved.
+    """
+    if not lines:
+        return
+    reserved = {row[0] for row in _execute(RESERVE_SQL, lines)}
+    missing = [pk for pk in lines if pk not in reserved]
+    if missing:
+        raise InsufficientStock(missing)
+
+
+def release_stock(lines):
+    """Give reserved units back without touching physical stock"""
+    if lines:
+        _adjust(lines, stock_factor=0, reserved_factor=-1)
+
+
+def commit_stock(order, lines, user=None):
+    """Turn the order's reservation into a sale"""
+    if lines:
+        rows = _adjust(lines, stock_factor=-1, reserved_factor=-1)
+        _record_movements(order, lines, rows, 'sale', user)
+
+
+def sell_stock(order, lines, user=None):
+    """Sell units that were never reserved (orders placed before reservations)"""
+    if not lines:
+        return
+    rows = _adjust(
+        lines, stock_factor=-1, reserved_factor=0,
+        condition='AND p.stock - p.reserved_stock >= v.quantity'
+    )
+    sold = {row[0] for row in rows}
+    missing = [pk for pk in lines if pk not in sold]
+    if missing:
+        raise InsufficientStock(missing)
+    _record_movements(order, lines, rows, 'sale', user)
+
+
+def return_stock(order, lines, user=None):
+    """Put sold units back into stock"""
+    if lines:
+        rows = _adjust(lines, stock_factor=1, reserved_factor=0)
+        _record_movements(order, lines, rows, 'return', user)
+
+
+def apply_status_change(order, new_status, user=None):
+    """
+    Move stock according to an order status transition and save the order.
+    Raises InsufficientStock when an unreserved order cannot be fulfilled
+    and OrderCancelled when reopening a cancelled order (its units were
+    already returned, so it could be neither sold nor returned again).
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order.pk)
+        old_status = order.status
+        if old_status == new_status:
+            return order
+        if old_status == 'cancelled':
+            raise OrderCancelled()
+
+        lines = order_lines(order)
+        if old_status == 'pending' and new_status == 'cancelled':
+            if order.reserved_until:
+                release_stock(lines)
+        elif old_status == 'pending':
+            if order.reserved_until:
+                commit_stock(order, lines, user)
+            else:
+                sell_stock(order, lines, user)
+        elif new_status == 'cancelled':
+            return_stock(order, lines, user)
+
+        order.status = new_status
+        order.reserved_until = None
+        order.save(update_fields=['status', 'reserved_until', 'updated_at'])
+        record_orders([order], old_status, new_status)
+    return order
+
+
+def release_expired_reservations(batch_size=100):
+    """
+    Cancel pending orders whose reservation expired and release their
+    units, one batch per call. Rows locked by a concurrent confirmation
+    are skipped. Returns the number of orders cancelled.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True).filter(
+                status='pending', reserved_until__lt=now
+            ).order_by('reserved_until')[:batch_size]
+        )
+        if not orders:
+            return 0
+        release_stock(order_lines(orders))
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(
+            status='cancelled', reserved_until=None, updated_at=now
+        )
+        record_orders(orders, 'pending', 'cancelled')
+    return len(orders)
@@ -0,0 +1,53 @@
+"""
+Detach (and optionally dump and drop) old stock movement partitions
+"""
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.stock_ledger import archive_partition, list_partitions, month_start, partition_bounds
+
+
+class Command(BaseCommand):
+    help = 'Separa las particiones de movimientos de stock anteriores a un mes (sin bloquear escrituras)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            required=True,
+            help='Mes (YYYY-MM): se archivan las particiones que terminan antes de su inicio'
+        )
+        parser.add_argument(
+            '--dir',
+            help='Directorio donde guardar cada partición como <nombre>.csv.gz'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Eliminar la tabla después de separarla (y exportarla si se usa --dir)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['before'].split('-'))
+            cutoff = month_start(date(year, month, 1))
+        except ValueError:
+            raise CommandError('--before debe tener el formato YYYY-MM')
+        if options['dir']:
+            os.makedirs(options['dir'], exist_ok=True)
+
+        names = [name for name in list_partitions() if partition_bounds(name)[1] <= cutoff]
+        if not names:
+            self.stdout.write('No hay particiones para archivar')
+        for name in names:
+            try:
+                path = archive_partition(name, options['dir'], options['drop'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            message = f'Partición separada: {name}'
+            if path:
+                message += f' -> {path}'
+            if options['drop']:
+                message += ' (eliminada)'
+            self.stdout.write(message)
@@ -0,0 +1,146 @@
+"""
+Compare the values()-based list serializers with the ModelSerializers they mirror
+"""
+import random
+import timeit
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.fast_serializers import ORDER_LIST, PRODUCT_LIST, STOCK_MOVEMENT_LIST
+from api.models import Category, Order, Product, StockMovement
+from api.serializers import OrderListSerializer, ProductListSerializer, StockMovementSerializer
+
+
+def _money(low, high):
+    return Decimal(random.randint(low * 100, high * 100)) / 100
+
+
+def sample_products(count):
+    categories = [Category(id=uuid.uuid4(), name=f'Categoría {n}') for n in range(5)]
+    return [
+        Product(
+            id=uuid.uuid4(), name=f'Producto {n}', slug=f'producto-{n}',
+            image=f'https://example.com/{n}.jpg' if n % 4 else None,
+            price=_money(1, 2000), discount=Decimal(random.choice([0, 0, 5, 12.5, 30])),
+            stock=random.randint(0, 500), rating=_money(0, 5).quantize(Decimal('0.01')),
+            review_count=random.randint(0, 300), category=random.choice(categories),
+            featured=bool(n % 2), recommended=bool(n % 3), active=True
+        )
+        for n in range(count)
+    ]
+
+
+def sample_orders(count):
+    now = timezone.now()
+    return [
+        Order(
+            id=uuid.uuid4(), order_number=f'ORD-{n:06d}', customer_name=f'Cliente {n}',
+            customer_phone='+57 300 123 4567', total=_money(10, 5000),
+            status=random.choice(Order.STATUS_CHOICES)[0], delivery_method='Domicilio',
+            created_at=now - timedelta(minutes=n * 7, microseconds=n)
+        )
+        for n in range(count)
+    ]
+
+
+def sample_stock_movements(count):
+    now = timezone.now()
+    products = sample_products(10)
+    return [
+        StockMovement(
+            id=uuid.uuid4(), product=random.choice(products),
+            type=random.choice(StockMovement.TYPE_CHOICES)[0],
+            quantity=random.randint(-20, 20), previous_stock=100, new_stock=random.randint(0, 200),
+            reason='Ajuste' if n % 2 else None,
+            created_at=now - timedelta(minutes=n, microseconds=n)
+        )
+        for n in range(count)
+    ]
+
+
+def as_values_row(instance, fast_serializer):
+    """The dict .values() would return for instance (related names and annotations included)"""
+    row = {}
+    for name, lookup, convert in fast_serializer.fields:
+        value = instance
+        parts = lookup.split('__')
+        for position, part in enumerate(parts):
+            field = next((f for f in type(value)._meta.concrete_fields if f.name == part), None)
+            if position == len(parts) - 1 and field is not None and field.is_relation:
+                value = getattr(value, field.attname)
+            else:
+                value = getattr(value, part)
+        row[lookup] = value
+    return row
+
+
+BENCHMARKS = {
+    'products': (ProductListSerializer, PRODUCT_LIST, sample_products),
+    'orders': (OrderListSerializer, ORDER_LIST, sample_orders),
+    'stock-movements': (StockMovementSerializer, STOCK_MOVEMENT_LIST, sample_stock_movements),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la serialización de una página de productos, órdenes y movimientos de stock '
+        'con los serializers rápidos frente a los ModelSerializer y verifica que el JSON sea idéntico'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=100,
+            help='Filas por página'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Páginas serializadas por medición (se toma la mejor de 5)'
+        )
+        parser.add_argument(
+            '--min-speedup',
+            type=float,
+            default=3.0,
+            help='Falla si alguna lista no alcanza esta aceleración'
+        )
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        renderer = JSONRenderer()
+        failures = []
+        for name, (serializer_class, fast_serializer, sample) in BENCHMARKS.items():
+            instances = sample(options['size'])
+            rows = [as_values_row(instance, fast_serializer) for instance in instances]
+
+            expected = renderer.render(serializer_class(instances, many=True).data)
+            actual = renderer.render(fast_serializer.serialize(rows))
+            if actual != expected:
+                failures.append(f'{name}: el JSON no coincide con {serializer_class.__name__}')
+                continue
+
+            drf = min(timeit.repeat(
+                lambda: serializer_class(instances, many=True).data,
+                number=options['repeat'], repeat=5
+            ))
+            fast = min(timeit.repeat(
+                lambda: fast_serializer.serialize(rows),
+                number=options['repeat'], repeat=5
+            ))
+            speedup = drf / fast
+            self.stdout.write(
+                f'{name}: {drf / options["repeat"] * 1000:.2f} ms -> '
+                f'{fast / options["repeat"] * 1000:.2f} ms por página ({speedup:.1f}x, JSON idéntico)'
+            )
+            if speedup < options['min_speedup']:
+                failures.append(f'{name}: {speedup:.1f}x < {options["min_speedup"]}x')
+
+        if failures:
+            raise CommandError('\n'.join(failures))
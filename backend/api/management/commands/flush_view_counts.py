@@ -0,0 +1,36 @@
+"""
+Flush buffered product views into products.view_count
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.view_counter import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = 'Guarda en la base de datos las visitas de productos acumuladas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Ejecutar continuamente en lugar de una sola vez'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help='Segundos entre cada flush en modo --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            updated = flush_view_counts()
+            if updated:
+                self.stdout.write(f'{updated} productos actualizados')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,100 @@
+"""
+Import products from a CSV or JSONL file, upserting on sku
+"""
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.product_import import DEFAULT_BATCH_SIZE, ImportReport, detect_format, import_products
+
+
+class Command(BaseCommand):
+    help = 'Importa productos desde un archivo CSV o JSONL (crea o actualiza por SKU)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo CSV o JSONL a importar')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Formato del archivo (por defecto se deduce de la extensión)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Filas validadas y escritas por transacción'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Archivo de progreso (por defecto <archivo>.checkpoint)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continuar después de la última línea guardada en el checkpoint'
+        )
+        parser.add_argument(
+            '--errors',
+            help='Escribir los errores por fila en este archivo JSONL en lugar de la salida de errores'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = detect_format(path, options['format'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+
+        start_after = 0
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                start_after = json.load(f)['last_line']
+            self.stdout.write(f'Reanudando después de la línea {start_after}')
+
+        errors_file = open(options['errors'], 'a') if options['errors'] else None
+
+        def on_error(error):
+            text = json.dumps(error, ensure_ascii=False)
+            if errors_file:
+                errors_file.write(text + '\n')
+            else:
+                self.stderr.write(text)
+
+        started = time.monotonic()
+
+        def on_batch(report):
+            self.save_checkpoint(checkpoint, path, report)
+            if options['verbosity'] > 1:
+                self.stdout.write(self.progress(report, started))
+
+        report = ImportReport(max_errors=0, on_error=on_error)
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                import_products(
+                    stream, fmt, options['batch_size'], start_after,
+                    report=report, on_batch=on_batch
+                )
+        finally:
+            if errors_file:
+                errors_file.close()
+
+        os.remove(checkpoint)
+        self.stdout.write(self.progress(report, started))
+
+    def progress(self, report, started):
+        elapsed = time.monotonic() - started
+        rate = report.processed / elapsed if elapsed else 0
+        return (
+            f'{report.processed} filas ({report.created} creadas, {report.updated} actualizadas, '
+            f'{report.failed} con errores) en {elapsed:.1f}s ({rate:.0f} filas/s)'
+        )
+
+    def save_checkpoint(self, checkpoint, path, report):
+        # Written to a temporary file and renamed: never left half written
+        tmp = f'{checkpoint}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'path': os.path.abspath(path), 'last_line': report.last_line}, f)
+        os.replace(tmp, checkpoint)
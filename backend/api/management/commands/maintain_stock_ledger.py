@@ -0,0 +1,43 @@
+"""
+Create upcoming stock movement partitions and take a balance snapshot
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.stock_ledger import PARTITION_MONTHS_AHEAD, ensure_partitions, take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones mensuales de movimientos de stock y toma un snapshot de saldos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Ejecutar continuamente en lugar de una sola vez'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600,
+            help='Segundos entre cada pasada en modo --loop'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=PARTITION_MONTHS_AHEAD,
+            help='Meses futuros con partición creada de antemano'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for name in ensure_partitions(options['months_ahead']):
+                self.stdout.write(f'Partición creada: {name}')
+            taken_at, products = take_snapshot()
+            self.stdout.write(f'Snapshot {taken_at:%Y-%m-%d %H:%M}: {products} productos')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
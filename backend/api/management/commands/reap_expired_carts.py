@@ -0,0 +1,67 @@
+"""
+Delete expired carts and their items in small batches
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.carts import delete_expired_carts
+
+
+class Command(BaseCommand):
+    help = 'Elimina carritos vencidos y sus items en lotes pequeños'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Ejecutar continuamente en lugar de una sola vez'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600,
+            help='Segundos entre cada pasada en modo --loop'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Carritos eliminados por transacción'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Pausa en segundos entre lotes para no saturar la base de datos'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.reap(options['batch_size'], options['sleep'], options['verbosity'])
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def reap(self, batch_size, pause, verbosity):
+        carts = items = 0
+        started = time.monotonic()
+        while True:
+            deleted_carts, deleted_items = delete_expired_carts(batch_size)
+            carts += deleted_carts
+            items += deleted_items
+            if deleted_carts < batch_size:
+                break
+            if verbosity > 1:
+                self.stdout.write(f'{carts} carritos, {items} items eliminados...')
+            time.sleep(pause)
+
+        if carts:
+            elapsed = time.monotonic() - started
+            rate = (carts + items) / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{carts} carritos y {items} items eliminados '
+                f'en {elapsed:.1f}s ({rate:.0f} filas/s)'
+            )
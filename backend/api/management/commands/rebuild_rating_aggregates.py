@@ -0,0 +1,14 @@
+"""
+Recompute product rating aggregates from the reviews table
+"""
+from django.core.management.base import BaseCommand
+
+from api.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recalcula rating, review_count e histograma de estrellas de todos los productos'
+
+    def handle(self, *args, **options):
+        updated = rebuild_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS(f'{updated} productos actualizados'))
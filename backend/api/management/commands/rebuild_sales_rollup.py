@@ -0,0 +1,16 @@
+"""
+Rebuild the daily sales rollups from the orders table
+"""
+from django.core.management.base import BaseCommand
+
+from api.analytics import rebuild_sales_rollup
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las tablas de ventas diarias (daily_sales_rollup y daily_product_sales)'
+
+    def handle(self, *args, **options):
+        days, products = rebuild_sales_rollup()
+        self.stdout.write(self.style.SUCCESS(
+            f'{days} filas por día y estado, {products} filas por día y producto'
+        ))
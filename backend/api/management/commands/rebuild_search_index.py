@@ -0,0 +1,15 @@
+"""
+Rebuild products.search_vector for every product
+"""
+from django.core.management.base import BaseCommand
+
+from api.models import Product
+from api.search import PRODUCT_SEARCH_VECTOR
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el vector de búsqueda full-text de todos los productos'
+
+    def handle(self, *args, **options):
+        updated = Product.objects.update(search_vector=PRODUCT_SEARCH_VECTOR)
+        self.stdout.write(self.style.SUCCESS(f'{updated} productos indexados'))
@@ -0,0 +1,37 @@
+"""
+Refresh the top-selling and low-stock materialized views
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.product_reports import ensure_product_reports, refresh_product_reports
+
+
+class Command(BaseCommand):
+    help = 'Actualiza las vistas materializadas de productos más vendidos y con bajo stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Ejecutar continuamente en lugar de una sola vez'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300,
+            help='Segundos entre cada actualización en modo --loop'
+        )
+
+    def handle(self, *args, **options):
+        ensure_product_reports()
+        while True:
+            started = time.monotonic()
+            refresh_product_reports()
+            self.stdout.write(f'Vistas actualizadas en {time.monotonic() - started:.2f}s')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
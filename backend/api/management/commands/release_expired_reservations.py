@@ -0,0 +1,47 @@
+"""
+Cancel pending orders whose stock reservation expired
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.inventory import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = 'Cancela órdenes pendientes con reserva vencida y libera su stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Ejecutar continuamente en lugar de una sola vez'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Segundos entre cada revisión en modo --loop'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Órdenes procesadas por transacción'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                released = release_expired_reservations(options['batch_size'])
+                total += released
+                if released < options['batch_size']:
+                    break
+            if total:
+                self.stdout.write(f'{total} órdenes canceladas por reserva vencida')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -6,6 +6,8 @@ import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
@@ -165,6 +167,11 @@ class Product(models.Model):
         default=0,
         validators=[MinValueValidator(0)]
     )
+    # Units held by pending orders (see api/inventory.py)
+    reserved_stock = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
     
     # SKU
     sku = models.CharField(max_length=100, unique=True, blank=True, null=True)
@@ -234,6 +241,13 @@ class Product(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(5)]
     )
     review_count = models.IntegerField(default=0)
+    # Running aggregates behind rating (see api/ratings.py)
+    rating_sum = models.IntegerField(default=0)
+    rating_count_1 = models.IntegerField(default=0)
+    rating_count_2 = models.IntegerField(default=0)
+    rating_count_3 = models.IntegerField(default=0)
+    rating_count_4 = models.IntegerField(default=0)
+    rating_count_5 = models.IntegerField(default=0)
     
     # Stock alert
     min_stock = models.IntegerField(
@@ -241,6 +255,9 @@ class Product(models.Model):
         validators=[MinValueValidator(0)]
     )
     
+    # Full-text search (maintained by the update_product_search_vector trigger)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -267,6 +284,21 @@ class Product(models.Model):
             models.Index(fields=['-sales_count']),
             models.Index(fields=['-view_count']),
             models.Index(fields=['-rating']),
+            models.Index(fields=['-created_at', '-id']),
+            GinIndex(fields=['search_vector'], name='idx_products_search_vector'),
+            GinIndex(fields=['name'], name='idx_products_name_trgm', opclasses=['gin_trgm_ops']),
+            # Feed the top_selling_products / low_stock_products views (api/product_reports.py)
+            models.Index(
+                fields=['-sales_count', '-rating'],
+                name='idx_products_top_selling',
+                condition=models.Q(active=True)
+            ),
+            models.Index(
+                fields=['stock'],
+                name='idx_products_low_stock',
+                include=['name', 'sku', 'min_stock', 'category'],
+                condition=models.Q(active=True, stock__lte=models.F('min_stock'))
+            ),
         ]
     
     def __str__(self):
@@ -279,6 +311,11 @@ class Product(models.Model):
             return self.price * (1 - self.discount / 100)
         return self.price
     
+    @property
+    def available_stock(self):
+        """Stock not held by pending orders"""
+        return self.stock - self.reserved_stock
+    
     @property
     def is_low_stock(self):
         """Check if stock is below minimum"""
@@ -350,6 +387,9 @@ class Order(models.Model):
     notes = models.TextField(blank=True, null=True)
     admin_notes = models.TextField(blank=True, null=True)
     
+    # Stock reservation held while pending (null once released or committed)
+    reserved_until = models.DateTimeField(blank=True, null=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -361,10 +401,16 @@ class Order(models.Model):
             models.Index(fields=['order_number']),
             models.Index(fields=['user']),
             models.Index(fields=['status']),
-            models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
             models.Index(fields=['customer_phone']),
             models.Index(fields=['customer_email']),
             models.Index(fields=['customer_name']),
+            models.Index(
+                fields=['reserved_until'],
+                name='idx_orders_reserved_until',
+                condition=models.Q(status='pending', reserved_until__isnull=False)
+            ),
         ]
     
     def __str__(self):
@@ -540,7 +586,8 @@ class Review(models.Model):
             models.Index(fields=['product']),
             models.Index(fields=['user']),
             models.Index(fields=['rating']),
-            models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['product', '-created_at', '-id']),
         ]
     
     def __str__(self):
@@ -588,13 +635,93 @@ class StockMovement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        # Range-partitioned by month on created_at (see api/stock_ledger.py)
         db_table = 'stock_movements'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['product']),
             models.Index(fields=['type']),
-            models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['product', '-created_at', '-id']),
         ]
     
     def __str__(self):
         return f"{self.get_type_display()} - {self.product.name} ({self.quantity})"
+
+
+class StockSnapshot(models.Model):
+    """Product stock at a snapshot cut-off (see api/stock_ledger.py)"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots'
+    )
+    taken_at = models.DateTimeField()
+    stock = models.IntegerField()
+    
+    class Meta:
+        db_table = 'stock_snapshots'
+        unique_together = [['product', 'taken_at']]
+        indexes = [
+            models.Index(fields=['product', '-taken_at']),
+            models.Index(fields=['-taken_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} @ {self.taken_at}: {self.stock}"
+
+
+# ============================================
+# SALES ROLLUP MODELS
+# ============================================
+
+class DailySalesRollup(models.Model):
+    """Orders and revenue per order date and status (see api/analytics.py)"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_sales_rollup'
+        unique_together = [['date', 'status']]
+    
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.order_count}"
+
+
+class DailyProductSales(models.Model):
+    """Units and revenue per order date and product, for orders that count as sales"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='daily_sales'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_sales'
+    )
+    
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_product_sales'
+        unique_together = [['date', 'product']]
+        indexes = [
+            models.Index(fields=['date', 'category']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.product_id}: {self.quantity}"
@@ -0,0 +1,53 @@
+"""
+Order number allocation for ProjectStore API
+
+Numbers look like ORD-YYYYMMDD-000123: the date the number was handed
+out plus a value from order_number_seq (the sequence the
+generate_order_number() trigger uses), so they never collide no matter
+how many orders arrive in the same second. Each worker reserves a block
+of sequence values in one round trip and hands them out locally.
+"""
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+
+class OrderNumberAllocator:
+    """Thread-safe per-process allocator backed by order_number_seq"""
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._numbers = deque()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            # A block reserved before a fork must not be shared by the children
+            if self._pid != os.getpid():
+                self._numbers.clear()
+                self._pid = os.getpid()
+            if not self._numbers:
+                self._numbers.extend(self._reserve_block())
+            number = self._numbers.popleft()
+        return f"ORD-{timezone.localdate():%Y%m%d}-{number:06d}"
+
+    def _reserve_block(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval('order_number_seq') FROM generate_series(1, %s)",
+                [self.block_size]
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+
+_allocator = OrderNumberAllocator(settings.ORDER_NUMBER_BLOCK_SIZE)
+
+
+def next_order_number():
+    """Unique, date-prefixed order number"""
+    return _allocator.next()
@@ -0,0 +1,93 @@
+"""
+Pagination classes for ProjectStore API
+"""
+import json
+
+from django.db import connection
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+def approximate_count(queryset):
+    """
+    Planner row estimate instead of an exact COUNT(*):
+    pg_class.reltuples for a whole table, EXPLAIN for a filtered queryset
+    """
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 until the table is first analyzed
+            return max(row[0], 0) if row else 0
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (-created_at, -id), backed by the matching
+    composite indexes. Every page costs the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_queryset = queryset
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response['X-Approximate-Count'] = approximate_count(self.base_queryset)
+        return response
+
+
+class OptInCursorPagination(BasePagination):
+    """
+    Page-number pagination by default; keyset pagination when the client
+    sends ?pagination=cursor (links returned in that mode carry ?cursor=)
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.cursor = CreatedAtCursorPagination()
+        self.active = self.page_number
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            self.cursor.cursor_query_param in request.query_params
+        )
+
+    @property
+    def display_page_controls(self):
+        return self.active.display_page_controls
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active = self.cursor if self.use_cursor(request) else self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number.get_schema_operation_parameters(view) +
+            self.cursor.get_schema_operation_parameters(view)
+        )
+
+    def get_results(self, data):
+        return self.active.get_results(data)
+
+    def to_html(self):
+        return self.active.to_html()
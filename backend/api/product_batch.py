@@ -0,0 +1,85 @@
+"""
+Batch product lookup for ProjectStore API
+
+Carts and orders need the current price and stock of several products
+at once. Each product is cached on its own (by id and by slug) under
+the catalog version, so overlapping carts share entries; the ones not
+cached are read with a single id__in / slug__in query.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .cache import CATALOG_NAMESPACE, get_version
+from .fast_serializers import PRODUCT_LIST
+from .models import Product
+
+
+# Ids or slugs accepted per request
+PRODUCT_BATCH_MAX_SIZE = 200
+
+PRODUCT_BATCH_CACHE_TIMEOUT = 60 * 5
+
+
+def parse_keys(values):
+    """
+    Product ids (normalized) and slugs from request values, split on
+    commas, in request order and without repeats
+    """
+    keys = []
+    for value in values:
+        for key in str(value).split(','):
+            key = key.strip()
+            if not key:
+                continue
+            try:
+                key = str(uuid.UUID(key))
+            except ValueError:
+                pass
+            keys.append(key)
+    return list(dict.fromkeys(keys))
+
+
+def _is_id(key):
+    try:
+        return str(uuid.UUID(key)) == key
+    except ValueError:
+        return False
+
+
+def _cache_key(version, key):
+    return f'product-batch:{version}:{key}'
+
+
+def get_products(keys):
+    """
+    (products in the order of keys, keys with no active product). keys
+    are ids or slugs as returned by parse_keys; products are rendered
+    like the product list.
+    """
+    version = get_version(CATALOG_NAMESPACE)
+    cached = cache.get_many([_cache_key(version, key) for key in keys])
+    found = {
+        key: cached[_cache_key(version, key)]
+        for key in keys if _cache_key(version, key) in cached
+    }
+
+    pending = [key for key in keys if key not in found]
+    if pending:
+        ids = [key for key in pending if _is_id(key)]
+        slugs = [key for key in pending if not _is_id(key)]
+        queryset = Product.objects.filter(active=True).filter(
+            Q(id__in=ids) | Q(slug__in=slugs)
+        )
+        fresh = {}
+        for product in PRODUCT_LIST.serialize(PRODUCT_LIST.values(queryset)):
+            fresh[product['id']] = product
+            fresh[product['slug']] = product
+        cache.set_many(
+            {_cache_key(version, key): product for key, product in fresh.items()},
+            PRODUCT_BATCH_CACHE_TIMEOUT
+        )
+        found.update((key, fresh[key]) for key in pending if key in fresh)
+
+    return [found[key] for key in keys if key in found], [key for key in keys if key not in found]
@@ -0,0 +1,283 @@
+"""
+Bulk product import for ProjectStore API
+
+Files are streamed row by row (CSV or JSONL, never loaded whole). Rows
+are validated against one in-memory category lookup, and each batch is
+checked for sku/slug clashes with one query and written with a single
+INSERT ... ON CONFLICT (sku) DO UPDATE. Invalid rows are reported and
+skipped; every batch commits on its own, so an interrupted import can
+resume after the last committed line.
+
+Columns left out of a row keep their current value on update (and the
+model default on insert). In CSV, empty cells count as left out and
+list columns (images, features, tags) are separated by '|'.
+"""
+import csv
+import json
+from collections import defaultdict
+
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from .cache import CATALOG_NAMESPACE, bump_version
+from .models import Category, Product
+from .search import SUGGEST_CACHE_NAMESPACE, clear_local_suggestions
+from .serializers import ProductImportSerializer
+
+
+FORMATS = ('csv', 'jsonl')
+
+DEFAULT_BATCH_SIZE = 1000
+
+CSV_LIST_SEPARATOR = '|'
+LIST_FIELDS = {'images', 'features', 'tags'}
+
+
+class ImportReport:
+    """Running totals and per-row errors of an import"""
+
+    def __init__(self, max_errors=None, on_error=None):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.last_line = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.on_error = on_error
+
+    def add_error(self, line, sku, messages):
+        error = {'line': line, 'sku': sku, 'errors': messages}
+        self.failed += 1
+        if self.on_error:
+            self.on_error(error)
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append(error)
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'last_line': self.last_line,
+            'errors': self.errors,
+        }
+
+
+def detect_format(filename, fmt=None):
+    """'csv' or 'jsonl', from fmt if given or else the file extension"""
+    fmt = (fmt or filename.rsplit('.', 1)[-1]).lower()
+    if fmt == 'ndjson':
+        fmt = 'jsonl'
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato no soportado: {fmt} (use csv o jsonl)')
+    return fmt
+
+
+# ============================================
+# PARSING
+# ============================================
+
+def _clean_csv_row(row):
+    cleaned = {}
+    for column, value in row.items():
+        if column is None or value is None:
+            continue
+        column = column.strip()
+        value = value.strip()
+        if not value:
+            continue
+        if column in LIST_FIELDS:
+            value = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+        cleaned[column] = value
+    return cleaned
+
+
+def read_rows(stream, fmt, start_after=0):
+    """
+    Yield (line, row, error) for every record after line start_after;
+    row is None when the line could not be parsed
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if reader.line_num > start_after:
+                yield reader.line_num, _clean_csv_row(row), None
+        return
+
+    for line, text in enumerate(stream, 1):
+        if line <= start_after or not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            yield line, None, f'JSON inválido: {exc}'
+            continue
+        if isinstance(row, dict):
+            yield line, row, None
+        else:
+            yield line, None, 'Cada línea debe ser un objeto JSON'
+
+
+def category_lookup():
+    """{slug, lowercased name or id: category id} for every category, in one query"""
+    lookup = {}
+    for pk, slug, name in Category.objects.values_list('id', 'slug', 'name'):
+        lookup[str(pk)] = pk
+        lookup[name.lower()] = pk
+        lookup[slug] = pk
+    return lookup
+
+
+def _error_messages(detail):
+    if isinstance(detail, dict):
+        return [
+            f'{field}: {message}' if field != 'non_field_errors' else str(message)
+            for field, messages in detail.items()
+            for message in _error_messages(messages)
+        ]
+    if isinstance(detail, list):
+        return [message for item in detail for message in _error_messages(item)]
+    return [str(detail)]
+
+
+# ============================================
+# WRITING
+# ============================================
+
+def _upsert(rows):
+    """
+    One INSERT ... ON CONFLICT per set of columns, so a row only
+    overwrites the columns it provides
+    """
+    groups = defaultdict(list)
+    for data, slug_given in rows:
+        columns = set(data) - {'sku'}
+        if not slug_given:
+            columns.discard('slug')
+        groups[frozenset(columns)].append(data)
+
+    for columns, group in groups.items():
+        Product.objects.bulk_create(
+            [Product(**_model_kwargs(data)) for data in group],
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=sorted(columns) + ['updated_at']
+        )
+
+
+def _model_kwargs(data):
+    kwargs = dict(data)
+    kwargs['category_id'] = kwargs.pop('category')
+    return kwargs
+
+
+def _write_batch(batch, report):
+    """
+    Check a batch for sku/slug clashes with one query, then upsert the
+    rest. If the batch still hits a constraint (e.g. a concurrent write),
+    rows are retried one by one so only the offending ones fail.
+    """
+    rows = {}
+    for line, data, slug_given in batch:
+        if data['sku'] in rows:
+            report.add_error(rows[data['sku']][0], data['sku'], [
+                'SKU repetido más adelante en el archivo; se importa la última fila'
+            ])
+        rows[data['sku']] = (line, data, slug_given)
+
+    existing = Product.objects.filter(
+        Q(sku__in=list(rows)) | Q(slug__in=[data['slug'] for line, data, given in rows.values()])
+    ).values_list('sku', 'slug')
+    existing_skus = set()
+    slug_owners = {}
+    for sku, slug in existing:
+        if sku in rows:
+            existing_skus.add(sku)
+        slug_owners[slug] = sku
+
+    accepted = []
+    for line, data, slug_given in rows.values():
+        sku = data['sku']
+        writes_slug = slug_given or sku not in existing_skus
+        owner = slug_owners.get(data['slug'], sku)
+        if writes_slug and owner != sku:
+            report.add_error(line, sku, [f"slug: '{data['slug']}' ya está en uso"])
+            continue
+        if writes_slug:
+            slug_owners[data['slug']] = sku
+        accepted.append((line, data, slug_given))
+
+    try:
+        with transaction.atomic():
+            _upsert([(data, slug_given) for line, data, slug_given in accepted])
+        written = accepted
+    except (DataError, IntegrityError):
+        written = []
+        for line, data, slug_given in accepted:
+            try:
+                with transaction.atomic():
+                    _upsert([(data, slug_given)])
+                written.append((line, data, slug_given))
+            except (DataError, IntegrityError) as exc:
+                report.add_error(line, data['sku'], [str(exc).strip()])
+
+    for line, data, slug_given in written:
+        if data['sku'] in existing_skus:
+            report.updated += 1
+        else:
+            report.created += 1
+
+
+def _invalidate_caches():
+    # bulk_create sends no post_save, so the signal handlers never run
+    bump_version(CATALOG_NAMESPACE)
+    bump_version(SUGGEST_CACHE_NAMESPACE)
+    clear_local_suggestions()
+
+
+def import_products(stream, fmt, batch_size=DEFAULT_BATCH_SIZE, start_after=0,
+                    report=None, on_batch=None):
+    """
+    Import every row of stream after line start_after. After each
+    committed batch report.last_line is the line to resume after and
+    on_batch(report) is called (e.g. to save a checkpoint).
+    """
+    report = report or ImportReport()
+    serializer = ProductImportSerializer(context={'categories': category_lookup()})
+    batch = []
+    line = start_after
+
+    def flush():
+        if batch:
+            _write_batch(batch, report)
+            batch.clear()
+            _invalidate_caches()
+        report.last_line = line
+        if on_batch:
+            on_batch(report)
+
+    for line, row, error in read_rows(stream, fmt, start_after):
+        report.processed += 1
+        if error:
+            report.add_error(line, None, [error])
+            continue
+        # One serializer for every row: its fields are built only once
+        try:
+            data = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            report.add_error(line, row.get('sku'), _error_messages(exc.detail))
+            continue
+
+        slug_given = bool(data.get('slug'))
+        if not slug_given:
+            data['slug'] = slugify(data['name'])
+        batch.append((line, data, slug_given))
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return report
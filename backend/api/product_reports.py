@@ -0,0 +1,128 @@
+"""
+Top-selling and low-stock product reports for ProjectStore API
+
+Both are materialized views refreshed with REFRESH MATERIALIZED VIEW
+CONCURRENTLY (readers are never blocked) by the refresh_product_reports
+command. Responses are cached until the next refresh bumps the version.
+"""
+from django.db import connection, transaction
+
+from .cache import bump_version, get_or_compute, get_version
+from .serializers import LowStockProductSerializer, TopSellingProductSerializer
+
+
+PRODUCT_REPORTS_NAMESPACE = 'product-reports'
+
+# Fallback only: a refresh invalidates the cached responses
+REPORT_CACHE_TIMEOUT = 60 * 60
+
+TOP_SELLING_SIZE = 20
+
+# The only definition of both views (database/schema.sql defers to it).
+# name -> (query, unique index required by REFRESH ... CONCURRENTLY, comment)
+MATERIALIZED_VIEWS = {
+    'top_selling_products': (
+        f"""
+        SELECT
+            p.id,
+            p.name,
+            p.slug,
+            p.image,
+            p.price,
+            p.discount,
+            p.stock,
+            p.sales_count,
+            p.rating,
+            p.review_count,
+            c.name AS category_name,
+            CASE
+                WHEN p.discount > 0 THEN ROUND(p.price * (1 - p.discount / 100), 2)
+                ELSE p.price
+            END AS final_price
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE p.active = true
+        ORDER BY p.sales_count DESC, p.rating DESC
+        LIMIT {TOP_SELLING_SIZE}
+        """,
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_top_selling_products_id ON top_selling_products(id)',
+        f'Top {TOP_SELLING_SIZE} productos más vendidos activos'
+    ),
+    'low_stock_products': (
+        """
+        SELECT
+            p.id,
+            p.name,
+            p.sku,
+            p.stock,
+            p.min_stock,
+            c.name AS category_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE p.active = true
+          AND p.stock <= p.min_stock
+        ORDER BY p.stock ASC
+        """,
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_low_stock_products_id ON low_stock_products(id)',
+        'Productos activos con stock bajo o agotado'
+    ),
+}
+
+
+def ensure_product_reports():
+    """
+    Create the materialized views if missing. Databases built from an
+    older schema have plain views under the same names; those are
+    dropped first (the name is taken and they cannot be indexed).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, (query, unique_index, comment) in MATERIALIZED_VIEWS.items():
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE relname = %s AND relkind IN ('v', 'm')"
+                " AND pg_table_is_visible(oid)",
+                [name]
+            )
+            row = cursor.fetchone()
+            if row and row[0] == 'v':
+                cursor.execute(f'DROP VIEW {name}')
+            if not row or row[0] == 'v':
+                cursor.execute(f'CREATE MATERIALIZED VIEW {name} AS {query}')
+                cursor.execute(f'COMMENT ON MATERIALIZED VIEW {name} IS %s', [comment])
+            cursor.execute(unique_index)
+
+
+def refresh_product_reports():
+    """Refresh both views without blocking readers, then drop cached responses"""
+    with connection.cursor() as cursor:
+        for name in MATERIALIZED_VIEWS:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {name}')
+    bump_version(PRODUCT_REPORTS_NAMESPACE)
+
+
+def _fetch(sql, params=None):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column.name for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _cached(key, compute):
+    return get_or_compute(
+        f'product-reports:{key}', compute, REPORT_CACHE_TIMEOUT,
+        version=get_version(PRODUCT_REPORTS_NAMESPACE)
+    )
+
+
+def get_top_selling(limit=TOP_SELLING_SIZE):
+    """Best-selling active products as of the last refresh"""
+    return _cached(f'top-selling:{limit}', lambda: TopSellingProductSerializer(_fetch(
+        'SELECT * FROM top_selling_products ORDER BY sales_count DESC, rating DESC LIMIT %s',
+        [limit]
+    ), many=True).data)
+
+
+def get_low_stock():
+    """Active products at or below their minimum stock as of the last refresh"""
+    return _cached('low-stock', lambda: LowStockProductSerializer(_fetch(
+        'SELECT * FROM low_stock_products ORDER BY stock ASC, name ASC'
+    ), many=True).data)
@@ -0,0 +1,107 @@
+"""
+Incremental product rating aggregates for ProjectStore API
+
+Each product keeps rating_sum, review_count and a 1-5 star histogram
+(rating_count_1 ... rating_count_5). A review write applies its delta
+with one UPDATE of F() expressions, so the cost does not depend on how
+many reviews the product already has.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .cache import CATALOG_NAMESPACE, bump_version
+from .models import Product
+
+
+STARS = range(1, 6)
+
+REBUILD_SQL = """
+    UPDATE products AS p
+    SET rating_sum = COALESCE(r.rating_sum, 0),
+        review_count = COALESCE(r.review_count, 0),
+        rating = COALESCE(ROUND(r.rating_sum::numeric / NULLIF(r.review_count, 0), 2), 0),
+        rating_count_1 = COALESCE(r.count_1, 0),
+        rating_count_2 = COALESCE(r.count_2, 0),
+        rating_count_3 = COALESCE(r.count_3, 0),
+        rating_count_4 = COALESCE(r.count_4, 0),
+        rating_count_5 = COALESCE(r.count_5, 0)
+    FROM products AS target
+    LEFT JOIN (
+        SELECT
+            product_id,
+            SUM(rating) AS rating_sum,
+            COUNT(*) AS review_count,
+            COUNT(*) FILTER (WHERE rating = 1) AS count_1,
+            COUNT(*) FILTER (WHERE rating = 2) AS count_2,
+            COUNT(*) FILTER (WHERE rating = 3) AS count_3,
+            COUNT(*) FILTER (WHERE rating = 4) AS count_4,
+            COUNT(*) FILTER (WHERE rating = 5) AS count_5
+        FROM reviews
+        GROUP BY product_id
+    ) AS r ON r.product_id = target.id
+    WHERE p.id = target.id
+"""
+
+
+def apply_rating_change(product_id, added=None, removed=None):
+    """
+    Apply one review's change to a product's aggregates:
+    added is the new rating (create/update), removed the old one (update/delete)
+    """
+    count_delta = (1 if added else 0) - (1 if removed else 0)
+    sum_delta = (added or 0) - (removed or 0)
+    if not count_delta and not sum_delta:
+        return
+
+    histogram = {}
+    if added:
+        histogram[added] = histogram.get(added, 0) + 1
+    if removed:
+        histogram[removed] = histogram.get(removed, 0) - 1
+
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('review_count') + count_delta
+    updates = {
+        'rating_sum': new_sum,
+        'review_count': new_count,
+        # Right-hand sides see the row before the update
+        'rating': Case(
+            When(review_count__lte=-count_delta, then=Value(0)),
+            default=Round(
+                Cast(new_sum, DecimalField(max_digits=14, decimal_places=4)) / new_count,
+                2
+            ),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        'updated_at': timezone.now(),
+    }
+    for star, delta in histogram.items():
+        if delta:
+            field = f'rating_count_{star}'
+            updates[field] = F(field) + delta
+
+    Product.objects.filter(pk=product_id).update(**updates)
+    # Listings show and sort by rating; update() sends no post_save
+    transaction.on_commit(lambda: bump_version(CATALOG_NAMESPACE))
+
+
+def rating_summary(product):
+    """Average, count and star histogram for a product"""
+    return {
+        'rating': product.rating,
+        'review_count': product.review_count,
+        'histogram': {
+            str(star): getattr(product, f'rating_count_{star}') for star in STARS
+        },
+    }
+
+
+def rebuild_rating_aggregates():
+    """Recompute every product's aggregates from the reviews table"""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
+        updated = cursor.rowcount
+    bump_version(CATALOG_NAMESPACE)
+    return updated
@@ -0,0 +1,108 @@
+"""
+Full-text product search for ProjectStore API
+"""
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+)
+from django.db.models import F, Func, TextField, Value
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .cache import LRUCache, get_version
+from .models import Product
+
+
+# Text search configuration defined in database/schema.sql
+# (Spanish stemming + unaccent)
+SEARCH_CONFIG = 'spanish_unaccent'
+
+# Mirrors the update_product_search_vector() trigger:
+# name (A) > tags (B) > description (C)
+PRODUCT_SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+    SearchVector(
+        Func(F('tags'), Value(' '), function='array_to_string', output_field=TextField()),
+        weight='B',
+        config=SEARCH_CONFIG
+    ) +
+    SearchVector('description', weight='C', config=SEARCH_CONFIG)
+)
+
+
+def search_products(queryset, query, order_by_rank=True):
+    """Filter products matching a full-text query, ranked by relevance"""
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    queryset = queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+    )
+    if order_by_rank:
+        queryset = queryset.order_by('-rank', '-created_at')
+    return queryset
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the products.search_vector GIN index.
+    Results are ordered by rank unless an explicit ?ordering= is given.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = ' '.join(self.get_search_terms(request))
+        if not query:
+            return queryset
+        has_ordering = bool(request.query_params.get(api_settings.ORDERING_PARAM))
+        return search_products(queryset, query, order_by_rank=not has_ordering)
+
+
+# ============================================
+# TYPEAHEAD SUGGESTIONS
+# ============================================
+
+SUGGEST_CACHE_NAMESPACE = 'product-suggest'
+SUGGEST_MIN_LENGTH = 2
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+
+# Hot prefixes per worker; entries are tagged with the namespace version
+# so a product save in any worker invalidates them everywhere
+_suggest_cache = LRUCache(maxsize=2048)
+
+
+def normalize_prefix(query):
+    """Lowercase and collapse whitespace so equivalent prefixes share a cache entry"""
+    return ' '.join(query.lower().split())
+
+
+def suggest_products(query, limit=SUGGEST_DEFAULT_LIMIT):
+    """
+    Top product name matches for a typed prefix, using the
+    idx_products_name_trgm GIN index (word similarity operator)
+    """
+    prefix = normalize_prefix(query)
+    if len(prefix) < SUGGEST_MIN_LENGTH:
+        return []
+
+    version = get_version(SUGGEST_CACHE_NAMESPACE)
+    key = (prefix, limit)
+    cached = _suggest_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rows = Product.objects.filter(
+        active=True,
+        name__trigram_word_similar=prefix
+    ).annotate(
+        similarity=TrigramWordSimilarity(prefix, 'name')
+    ).order_by('-similarity', '-sales_count').values('id', 'name', 'slug', 'image')[:limit]
+
+    suggestions = [
+        {'id': str(row['id']), 'name': row['name'], 'slug': row['slug'], 'image': row['image']}
+        for row in rows
+    ]
+    _suggest_cache.set(key, (version, suggestions))
+    return suggestions
+
+
+def clear_local_suggestions():
+    """Drop this worker's cached prefixes"""
+    _suggest_cache.clear()
@@ -1,12 +1,23 @@
 """
 Serializers for ProjectStore API
 """
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.db import transaction
 from .models import (
     User, Category, Product, Order, OrderItem,
     Cart, CartItem, Review, StockMovement
 )
+from .analytics import PERIODS, TOP_DEFAULT_LIMIT, TOP_MAX_LIMIT, record_orders
+from .category_tree import get_category_index
+from .inventory import InsufficientStock, reservation_deadline, reserve_stock
+from .order_numbers import next_order_number
+
+
+CENTS = Decimal('0.01')
 
 
 # ============================================
@@ -80,9 +91,11 @@ class CategorySerializer(serializers.ModelSerializer):
         ]
     
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategorySerializer(obj.children.filter(is_active=True), many=True).data
-        return []
+        index = self.context.get('category_index')
+        if index is None:
+            index = get_category_index()
+        node = index.get(obj.slug)
+        return node['children'] if node else []
 
 
 # ============================================
@@ -107,13 +120,18 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     """Product detail serializer (all fields)"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    available_stock = serializers.IntegerField(read_only=True)
     is_low_stock = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Product
-        fields = '__all__'
+        # The star histogram is served by /products/{slug}/rating-summary/
+        exclude = [
+            'search_vector', 'rating_sum', 'rating_count_1', 'rating_count_2',
+            'rating_count_3', 'rating_count_4', 'rating_count_5'
+        ]
         read_only_fields = [
-            'id', 'view_count', 'sales_count', 'rating',
+            'id', 'reserved_stock', 'view_count', 'sales_count', 'rating',
             'review_count', 'created_at', 'updated_at'
         ]
 
@@ -123,7 +141,80 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
-        exclude = ['view_count', 'sales_count', 'rating', 'review_count']
+        exclude = [
+            'reserved_stock', 'view_count', 'sales_count', 'rating',
+            'review_count', 'rating_sum', 'rating_count_1', 'rating_count_2',
+            'rating_count_3', 'rating_count_4', 'rating_count_5', 'search_vector'
+        ]
+    
+    def update(self, instance, validated_data):
+        """
+        Write only the submitted columns. reserved_stock, stock, the
+        rating aggregates and view_count are changed by concurrent
+        conditional UPDATEs; a full save would overwrite them with the
+        values loaded at the start of the request.
+        """
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk import (see api/product_import.py). category is a
+    slug, name or id resolved through context['categories']; sku and
+    slug uniqueness is checked per batch by the importer.
+    """
+    category = serializers.CharField()
+    
+    class Meta:
+        model = Product
+        fields = [
+            'sku', 'name', 'slug', 'description', 'category',
+            'price', 'discount', 'stock', 'min_stock',
+            'image', 'images', 'brand', 'color', 'size', 'material',
+            'weight', 'dimensions', 'warranty', 'shipping', 'returns',
+            'features', 'tags', 'active', 'featured', 'recommended',
+            'original_price', 'offer_start_date', 'offer_end_date'
+        ]
+        extra_kwargs = {
+            'sku': {'required': True, 'allow_null': False, 'allow_blank': False, 'validators': []},
+            'slug': {'required': False, 'validators': []},
+        }
+    
+    def validate_category(self, value):
+        categories = self.context['categories']
+        category_id = categories.get(value) or categories.get(value.lower())
+        if category_id is None:
+            raise serializers.ValidationError(f"Categoría no encontrada: {value}")
+        return category_id
+
+
+class TopSellingProductSerializer(serializers.Serializer):
+    """Row of the top_selling_products materialized view"""
+    id = serializers.UUIDField()
+    name = serializers.CharField()
+    slug = serializers.CharField()
+    image = serializers.CharField(allow_null=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount = serializers.DecimalField(max_digits=5, decimal_places=2)
+    final_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    stock = serializers.IntegerField()
+    sales_count = serializers.IntegerField()
+    rating = serializers.DecimalField(max_digits=3, decimal_places=2)
+    review_count = serializers.IntegerField()
+    category_name = serializers.CharField(allow_null=True)
+
+
+class LowStockProductSerializer(serializers.Serializer):
+    """Row of the low_stock_products materialized view"""
+    id = serializers.UUIDField()
+    name = serializers.CharField()
+    sku = serializers.CharField(allow_null=True)
+    stock = serializers.IntegerField()
+    min_stock = serializers.IntegerField()
+    category_name = serializers.CharField(allow_null=True)
 
 
 # ============================================
@@ -160,12 +251,24 @@ class OrderDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = '__all__'
-        read_only_fields = ['id', 'order_number', 'created_at', 'updated_at']
+        # status changes go through /orders/{id}/update_status/ (stock and analytics)
+        read_only_fields = [
+            'id', 'order_number', 'status', 'reserved_until', 'created_at', 'updated_at'
+        ]
+
+
+class OrderItemCreateSerializer(serializers.Serializer):
+    """Order line as sent by the client; prices are resolved server-side"""
+    product = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
-    """Order creation serializer"""
-    items = OrderItemSerializer(many=True)
+    """
+    Order creation serializer.
+    Prices and totals come from the current products, not from the client.
+    """
+    items = OrderItemCreateSerializer(many=True, write_only=True)
     
     class Meta:
         model = Order
@@ -174,29 +277,82 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             'customer_address', 'delivery_method', 'subtotal',
             'discount', 'total', 'notes', 'items'
         ]
+        read_only_fields = ['subtotal', 'discount', 'total']
+    
+    def validate_items(self, items):
+        if not items:
+            raise serializers.ValidationError("La orden debe tener al menos un producto")
+        
+        # Load every referenced product in one query
+        product_ids = {item['product'] for item in items}
+        products = Product.objects.filter(id__in=product_ids, active=True).in_bulk()
+        missing = product_ids - products.keys()
+        if missing:
+            raise serializers.ValidationError(
+                f"Productos no disponibles: {', '.join(sorted(str(pk) for pk in missing))}"
+            )
+        
+        for item in items:
+            item['product'] = products[item['product']]
+        return items
     
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         
-        # Generate order number
-        import datetime
-        now = datetime.datetime.now()
-        order_number = f"ORD-{now.strftime('%Y%m%d%H%M%S')}"
+        order_number = next_order_number()
         
         # Add user if authenticated
         user = self.context['request'].user if self.context['request'].user.is_authenticated else None
         
-        order = Order.objects.create(
-            order_number=order_number,
-            user=user,
-            **validated_data
-        )
-        
-        # Create order items
+        # Resolve line prices from the products
+        items = []
+        subtotal = Decimal('0')
         for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
+            product = item_data['product']
+            quantity = item_data['quantity']
+            price = product.final_price.quantize(CENTS, rounding=ROUND_HALF_UP)
+            subtotal += product.price * quantity
+            items.append(OrderItem(
+                product=product,
+                product_name=product.name,
+                product_image=product.image,
+                price=price,
+                quantity=quantity,
+                subtotal=price * quantity
+            ))
+        total = sum((item.subtotal for item in items), Decimal('0'))
+        
+        lines = defaultdict(int)
+        for item in items:
+            lines[item.product.pk] += item.quantity
+        
+        with transaction.atomic():
+            try:
+                reserve_stock(lines)
+            except InsufficientStock as exc:
+                names = sorted({item.product_name for item in items if item.product.pk in exc.product_ids})
+                raise serializers.ValidationError(
+                    {'items': [f"Stock insuficiente para: {', '.join(names)}"]}
+                )
+            
+            order = Order.objects.create(
+                order_number=order_number,
+                user=user,
+                subtotal=subtotal,
+                discount=subtotal - total,
+                total=total,
+                reserved_until=reservation_deadline(),
+                **validated_data
+            )
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+            record_orders([order], None, order.status)
         
         return order
+    
+    def to_representation(self, instance):
+        return OrderDetailSerializer(instance, context=self.context).data
 
 
 # ============================================
@@ -228,20 +384,65 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 
 class CartSerializer(serializers.ModelSerializer):
-    """Cart serializer"""
+    """Cart serializer (load items with api.carts.cart_items_queryset)"""
     items = CartItemSerializer(many=True, read_only=True)
-    total = serializers.SerializerMethodField()
     
     class Meta:
         model = Cart
-        fields = ['id', 'items', 'total', 'created_at', 'expires_at']
+        fields = ['id', 'items', 'created_at', 'expires_at']
         read_only_fields = ['id', 'created_at', 'expires_at']
     
-    def get_total(self, obj):
-        return sum(
-            item.product.final_price * item.quantity
-            for item in obj.items.all()
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Summed from the serialized lines instead of walking the items again
+        total = sum(item['subtotal'] for item in data['items'])
+        return {'id': data['id'], 'items': data['items'], 'total': total, **data}
+
+
+class CartAddQuantitySerializer(serializers.Serializer):
+    """quantity sent to /cart/add_item/"""
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class CartUpdateQuantitySerializer(serializers.Serializer):
+    """quantity sent to /cart/update_item/ (0 removes the line)"""
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CartSyncItemSerializer(serializers.Serializer):
+    """Cart line sent to /cart/sync/"""
+    product_id = serializers.UUIDField()
+    quantity = serializers.IntegerField()
+
+
+class CartSyncSerializer(serializers.Serializer):
+    """
+    Whole desired cart ('replace') or quantity changes ('delta').
+    validated_data['lines'] is {product_id: quantity}.
+    """
+    mode = serializers.ChoiceField(choices=['replace', 'delta'], default='replace')
+    items = CartSyncItemSerializer(many=True)
+    
+    def validate(self, data):
+        lines = defaultdict(int)
+        for item in data['items']:
+            lines[item['product_id']] += item['quantity']
+        if data['mode'] == 'replace' and any(quantity < 0 for quantity in lines.values()):
+            raise serializers.ValidationError("Las cantidades no pueden ser negativas")
+        
+        # Only products being added must exist; removals are always allowed
+        added = {pk for pk, quantity in lines.items() if quantity > 0}
+        available = set(
+            Product.objects.filter(id__in=added, active=True).values_list('id', flat=True)
         )
+        missing = added - available
+        if missing:
+            raise serializers.ValidationError(
+                f"Productos no disponibles: {', '.join(sorted(str(pk) for pk in missing))}"
+            )
+        
+        data['lines'] = dict(lines)
+        return data
 
 
 # ============================================
@@ -281,3 +482,39 @@ class StockMovementSerializer(serializers.ModelSerializer):
             'previous_stock', 'new_stock', 'reason', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+
+
+# ============================================
+# ANALYTICS SERIALIZERS
+# ============================================
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """Query params shared by the admin analytics endpoints"""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    period = serializers.ChoiceField(choices=list(PERIODS), default='day')
+    limit = serializers.IntegerField(min_value=1, max_value=TOP_MAX_LIMIT, default=TOP_DEFAULT_LIMIT)
+    order_by = serializers.ChoiceField(choices=['quantity', 'revenue'], required=False)
+    
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError("date_from debe ser anterior a date_to")
+        return data
+
+
+# ============================================
+# EXPORT SERIALIZERS
+# ============================================
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Query params of the admin export endpoints"""
+    output = serializers.ChoiceField(choices=['csv', 'jsonl'], default='csv')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.MultipleChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    type = serializers.MultipleChoiceField(choices=StockMovement.TYPE_CHOICES, required=False)
+    
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError("date_from debe ser anterior a date_to")
+        return data
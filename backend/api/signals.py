@@ -0,0 +1,78 @@
+"""
+Model signal handlers for ProjectStore API
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import CATALOG_NAMESPACE, bump_version
+from .category_tree import CATEGORY_TREE_NAMESPACE
+from .models import Category, Product, Review
+from .ratings import apply_rating_change
+from .search import SUGGEST_CACHE_NAMESPACE, clear_local_suggestions
+
+
+# Product fields that appear in typeahead suggestions
+SUGGEST_FIELDS = {'name', 'slug', 'image', 'active', 'sales_count'}
+
+# Product fields whose updates do not change catalog listings
+CATALOG_VOLATILE_FIELDS = {'view_count'}
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, update_fields=None, **kwargs):
+    """Invalidate catalog-derived caches when a product or category changes"""
+    if update_fields and CATALOG_VOLATILE_FIELDS.issuperset(update_fields):
+        return
+    bump_version(CATALOG_NAMESPACE)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_suggestions(sender, update_fields=None, **kwargs):
+    """Invalidate cached typeahead prefixes when a product changes"""
+    if update_fields and not SUGGEST_FIELDS.intersection(update_fields):
+        return
+    bump_version(SUGGEST_CACHE_NAMESPACE)
+    clear_local_suggestions()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, **kwargs):
+    """Rebuild the cached category tree on the next read"""
+    bump_version(CATEGORY_TREE_NAMESPACE)
+
+
+@receiver(pre_save, sender=Review)
+def remember_stored_rating(sender, instance, **kwargs):
+    """The review's product and rating as stored, for the post_save delta"""
+    instance._stored_rating = None
+    if not instance._state.adding:
+        instance._stored_rating = Review.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'rating'
+        ).first()
+
+
+@receiver(post_save, sender=Review)
+def apply_saved_rating(sender, instance, **kwargs):
+    """Add (or move) a saved review's rating in the product aggregates"""
+    stored = getattr(instance, '_stored_rating', None)
+    if stored is None:
+        apply_rating_change(instance.product_id, added=instance.rating)
+    elif stored[0] == instance.product_id:
+        apply_rating_change(instance.product_id, added=instance.rating, removed=stored[1])
+    else:
+        apply_rating_change(stored[0], removed=stored[1])
+        apply_rating_change(instance.product_id, added=instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def remove_deleted_rating(sender, instance, **kwargs):
+    """
+    Remove a deleted review from the product aggregates; also runs for
+    admin deletes and cascades (user or product deleted)
+    """
+    apply_rating_change(instance.product_id, removed=instance.rating)
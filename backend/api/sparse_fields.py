@@ -0,0 +1,164 @@
+"""
+Sparse fieldsets for ProjectStore API
+
+Read endpoints accept ?fields=a,b (render only those fields) and
+?omit=a,b (render all but those). The chosen fields also narrow the
+query: only the columns behind them are selected (QuerySet.only) and
+only the relations they traverse are joined, so columns nobody asked
+for, like the product description, are never read.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _param_names(request, param):
+    value = request.query_params.get(param, '')
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    The names in available the request asks for, in their declared
+    order; None when neither ?fields= nor ?omit= is given
+    """
+    fields = _param_names(request, FIELDS_PARAM)
+    omit = _param_names(request, OMIT_PARAM)
+    if not fields and not omit:
+        return None
+    for param, names in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({param: [f"Unknown field(s): {', '.join(unknown)}"]})
+    return [
+        name for name in available
+        if (not fields or name in fields) and name not in omit
+    ]
+
+
+def readable_fields(serializer):
+    return [name for name, field in serializer.fields.items() if not field.write_only]
+
+
+def trim_serializer(serializer, names):
+    """Drop the fields not in names (from the child of a many=True serializer)"""
+    target = getattr(serializer, 'child', serializer)
+    for name in list(target.fields):
+        if name not in names:
+            target.fields.pop(name)
+    return serializer
+
+
+# ============================================
+# QUERY NARROWING
+# ============================================
+
+def _resolve_source(model, parts):
+    """
+    (column lookup or None, forward relations traversed) for a dotted
+    source. The lookup is None for reverse and many-to-many relations,
+    which are prefetched and need no column. Raises FieldDoesNotExist
+    for anything that is not a model field (properties, methods).
+    """
+    relations = []
+    for position, part in enumerate(parts):
+        field = model._meta.get_field(part)
+        path = '__'.join(parts[:position + 1])
+        if position == len(parts) - 1:
+            if not field.concrete or field.many_to_many:
+                return None, relations
+            return path, relations
+        if not (field.concrete and (field.many_to_one or field.one_to_one)):
+            raise FieldDoesNotExist(f'{part} is not a forward relation')
+        relations.append(path)
+        model = field.related_model
+    return None, relations
+
+
+def query_columns(serializer, names, extra_columns=None):
+    """
+    (columns, relations) needed to render names: the columns for
+    QuerySet.only() and the relations to select_related. None when a
+    field reads something that cannot be traced to columns.
+    """
+    extra_columns = extra_columns or {}
+    model = serializer.Meta.model
+    columns = {model._meta.pk.name}
+    relations = set()
+    for name in names:
+        if name in extra_columns:
+            columns.update(extra_columns[name])
+            continue
+        source = serializer.fields[name].source
+        if source == '*':
+            return None
+        try:
+            column, traversed = _resolve_source(model, source.split('.'))
+        except FieldDoesNotExist:
+            return None
+        if column:
+            columns.add(column)
+        relations.update(traversed)
+    return columns, relations
+
+
+def narrow_queryset(queryset, serializer, names, extra_columns=None):
+    """queryset selecting only what rendering names with serializer reads"""
+    needed = query_columns(serializer, names, extra_columns)
+    if needed is None:
+        return queryset
+    columns, relations = needed
+    # Instances must still carry the ordering values (cursor pagination)
+    for key in queryset.query.order_by or queryset.model._meta.ordering:
+        if not isinstance(key, str):
+            continue
+        try:
+            column, traversed = _resolve_source(queryset.model, key.lstrip('-').split('__'))
+        except FieldDoesNotExist:
+            continue
+        if column and not traversed:
+            columns.add(column)
+
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*sorted(columns))
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin applying ?fields= / ?omit= to the sparse_field_actions:
+    the serializer renders only the requested fields and the queryset
+    selects only their columns. sparse_field_columns maps fields that
+    are not plain columns (properties, method fields) to the columns
+    they read; any other such field leaves the query as it is.
+    """
+    sparse_field_actions = ['list', 'retrieve']
+    sparse_field_columns = {}
+
+    def get_sparse_fields(self, available):
+        return requested_fields(self.request, available)
+
+    def uses_sparse_fields(self):
+        return self.request.method in ('GET', 'HEAD') and self.action in self.sparse_field_actions
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.uses_sparse_fields():
+            names = self.get_sparse_fields(readable_fields(getattr(serializer, 'child', serializer)))
+            if names is not None:
+                trim_serializer(serializer, names)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.uses_sparse_fields():
+            return queryset
+        serializer = self.get_serializer_class()()
+        names = self.get_sparse_fields(readable_fields(serializer))
+        if names is None:
+            return queryset
+        return narrow_queryset(queryset, serializer, names, self.sparse_field_columns)
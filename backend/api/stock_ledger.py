@@ -0,0 +1,171 @@
+"""
+Stock movement ledger maintenance for ProjectStore API
+
+stock_movements is range-partitioned by (UTC) month on created_at
+(stock_movements_yYYYYmMM). Queries bounded by date only touch the
+partitions in range, and whole months can be detached and archived
+without rewriting or locking the rest of the table.
+
+stock_snapshots keeps each product's balance at periodic cut-offs
+(one row per product that moved since the previous snapshot), so the
+stock as of any date is the latest snapshot before it plus the short
+tail of movements after it, even once old months are archived.
+"""
+import gzip
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockSnapshot
+
+
+# Partitions created ahead of the current month; inserts fail if the
+# month a movement falls in has no partition
+PARTITION_MONTHS_AHEAD = 3
+
+PARTITION_PATTERN = re.compile(r'^stock_movements_y(\d{4})m(\d{2})$')
+
+# Movements newer than this may belong to transactions still in flight
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+SNAPSHOT_SQL = """
+    INSERT INTO stock_snapshots (id, product_id, taken_at, stock)
+    SELECT DISTINCT ON (product_id) gen_random_uuid(), product_id, %s, new_stock
+    FROM stock_movements
+    WHERE created_at > %s AND created_at <= %s
+    ORDER BY product_id, created_at DESC, id DESC
+"""
+
+PARTITIONS_SQL = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'stock_movements'
+    ORDER BY child.relname
+"""
+
+
+# ============================================
+# PARTITIONS
+# ============================================
+
+def month_start(value):
+    """First instant (UTC) of the month value falls in"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return month_start(start + timedelta(days=32))
+
+
+def partition_name(start):
+    return f'stock_movements_y{start.year:04d}m{start.month:02d}'
+
+
+def partition_bounds(name):
+    """(start, end) of a partition from its name"""
+    match = PARTITION_PATTERN.match(name)
+    start = datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+    return start, next_month(start)
+
+
+def list_partitions():
+    """Names of the attached monthly partitions, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL)
+        return [name for (name,) in cursor.fetchall() if PARTITION_PATTERN.match(name)]
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create the partitions from this month to months_ahead; returns the new ones"""
+    existing = set(list_partitions())
+    created = []
+    start = month_start(timezone.now())
+    for _ in range(months_ahead + 1):
+        name = partition_name(start)
+        if name not in existing:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF stock_movements '
+                    'FOR VALUES FROM (%s) TO (%s)',
+                    [start, next_month(start)]
+                )
+            created.append(name)
+        start = next_month(start)
+    return created
+
+
+def archive_partition(name, directory=None, drop=False):
+    """
+    Detach a monthly partition without blocking writers (DETACH ...
+    CONCURRENTLY, outside any transaction), optionally dump it to
+    <directory>/<name>.csv.gz and drop it. Refuses partitions not yet
+    covered by a snapshot, whose balances would otherwise be lost.
+    """
+    start, end = partition_bounds(name)
+    latest = StockSnapshot.objects.order_by('-taken_at').values_list('taken_at', flat=True).first()
+    if latest is None or latest < end:
+        raise ValueError(f'{name}: no hay un snapshot posterior al {end:%Y-%m-%d}')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE stock_movements DETACH PARTITION {name} CONCURRENTLY')
+        path = None
+        if directory:
+            path = os.path.join(directory, f'{name}.csv.gz')
+            with gzip.open(path, 'wt', newline='') as f:
+                cursor.copy_expert(f'COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)', f)
+        if drop:
+            cursor.execute(f'DROP TABLE {name}')
+    return path
+
+
+# ============================================
+# BALANCE SNAPSHOTS
+# ============================================
+
+def take_snapshot(now=None):
+    """
+    Record the balance of every product that moved since the previous
+    snapshot; returns (taken_at, products recorded)
+    """
+    taken_at = (now or timezone.now()) - SNAPSHOT_LAG
+    with transaction.atomic(), connection.cursor() as cursor:
+        # One snapshot at a time, so cut-offs never overlap
+        cursor.execute('LOCK TABLE stock_snapshots IN EXCLUSIVE MODE')
+        previous = StockSnapshot.objects.order_by('-taken_at').values_list('taken_at', flat=True).first()
+        if previous and previous >= taken_at:
+            return previous, 0
+        since = previous or datetime.min.replace(tzinfo=dt_timezone.utc)
+        cursor.execute(SNAPSHOT_SQL, [taken_at, since, taken_at])
+        return taken_at, cursor.rowcount
+
+
+def stock_as_of(product, at):
+    """Product stock at instant at: latest snapshot before it plus the tail of movements"""
+    snapshot = StockSnapshot.objects.filter(
+        product=product, taken_at__lte=at
+    ).order_by('-taken_at').values_list('taken_at', 'stock').first()
+
+    movements = StockMovement.objects.filter(product=product)
+    tail = movements.filter(created_at__lte=at)
+    if snapshot:
+        tail = tail.filter(created_at__gt=snapshot[0])
+    last = tail.order_by('-created_at', '-id').values_list('new_stock', flat=True).first()
+    if last is not None:
+        return last
+    if snapshot:
+        return snapshot[1]
+
+    # Nothing recorded up to that date: the stock before the next movement
+    following = movements.filter(created_at__gt=at).order_by(
+        'created_at', 'id'
+    ).values_list('previous_stock', flat=True).first()
+    if following is not None:
+        return following
+    return Product.objects.filter(pk=product.pk).values_list('stock', flat=True).first()
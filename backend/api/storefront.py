@@ -0,0 +1,101 @@
+"""
+Storefront home feed for ProjectStore API
+
+Everything the home page renders on first paint (categories, featured,
+recommended, top-selling and newest products) in one response. The
+sections are independent, so on a miss they are built concurrently,
+each in its own worker thread with its own database connection (under
+ASGI on the server's event loop, under WSGI on a short-lived one).
+The assembled feed is cached as a single entry, keyed by the catalog
+and product report versions.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import close_old_connections
+from rest_framework.settings import api_settings
+
+from .cache import CATALOG_NAMESPACE, get_or_compute, get_version
+from .category_tree import get_category_index
+from .fast_serializers import PRODUCT_LIST
+from .models import Category, Product
+from .product_reports import PRODUCT_REPORTS_NAMESPACE, get_top_selling
+from .serializers import CategorySerializer
+
+
+HOME_FEED_CACHE_TIMEOUT = 60 * 5
+HOME_FEED_STALE_TIMEOUT = 60 * 30
+
+
+def _active_products():
+    return Product.objects.filter(active=True).order_by('-created_at', '-id')
+
+
+def _product_list(queryset):
+    return PRODUCT_LIST.serialize(PRODUCT_LIST.values(queryset))
+
+
+def _categories():
+    # Same payload as GET /api/categories/
+    return CategorySerializer(
+        Category.objects.filter(is_active=True), many=True,
+        context={'category_index': get_category_index()}
+    ).data
+
+
+def featured_products():
+    """Active featured products; also served by GET /api/products/featured/"""
+    return _product_list(Product.objects.filter(active=True, featured=True))
+
+
+def recommended_products():
+    """Active recommended products; also served by GET /api/products/recommended/"""
+    return _product_list(Product.objects.filter(active=True, recommended=True))
+
+
+def _top_selling():
+    return get_top_selling()
+
+
+def _newest():
+    # The first page of GET /api/products/
+    return _product_list(_active_products()[:api_settings.PAGE_SIZE])
+
+
+SECTIONS = {
+    'categories': _categories,
+    'featured': featured_products,
+    'recommended': recommended_products,
+    'top_selling': _top_selling,
+    'newest': _newest,
+}
+
+
+def _build_section(build):
+    try:
+        return build()
+    finally:
+        # Worker threads do not get the request_finished cleanup
+        close_old_connections()
+
+
+async def _build_sections():
+    results = await asyncio.gather(*[
+        sync_to_async(_build_section, thread_sensitive=False)(build)
+        for build in SECTIONS.values()
+    ])
+    return dict(zip(SECTIONS, results))
+
+
+def build_home_feed():
+    """Every section of the home feed, built concurrently"""
+    return async_to_sync(_build_sections)()
+
+
+def get_home_feed():
+    """Cached home feed (stale-while-revalidate, single flight)"""
+    return get_or_compute(
+        'storefront:home', build_home_feed, HOME_FEED_CACHE_TIMEOUT,
+        version=(get_version(CATALOG_NAMESPACE), get_version(PRODUCT_REPORTS_NAMESPACE)),
+        stale_timeout=HOME_FEED_STALE_TIMEOUT
+    )
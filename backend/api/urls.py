@@ -7,6 +7,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
     register, login, current_user,
+    analytics_summary, analytics_revenue, analytics_top_products, analytics_top_categories,
+    import_products_view, export_data, storefront_home,
     CategoryViewSet, ProductViewSet, OrderViewSet,
     CartViewSet, ReviewViewSet, StockMovementViewSet
 )
@@ -27,6 +29,23 @@ urlpatterns = [
     path('auth/me/', current_user, name='current-user'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     
+    # Storefront
+    path('storefront/home/', storefront_home, name='storefront-home'),
+    
+    # Admin analytics
+    path('admin/analytics/', analytics_summary, name='analytics-summary'),
+    path('admin/analytics/revenue/', analytics_revenue, name='analytics-revenue'),
+    path('admin/analytics/top-products/', analytics_top_products, name='analytics-top-products'),
+    path('admin/analytics/top-categories/', analytics_top_categories, name='analytics-top-categories'),
+    
+    # Admin import
+    path('admin/import/products/', import_products_view, name='import-products'),
+    
+    # Admin exports (streamed CSV / JSONL)
+    path('admin/export/orders/', export_data, {'dataset': 'orders'}, name='export-orders'),
+    path('admin/export/order-items/', export_data, {'dataset': 'order-items'}, name='export-order-items'),
+    path('admin/export/stock-movements/', export_data, {'dataset': 'stock-movements'}, name='export-stock-movements'),
+    
     # Router URLs
     path('', include(router.urls)),
 ]
@@ -0,0 +1,151 @@
+"""
+Write-behind product view counter for ProjectStore API
+
+Product views are buffered in a counter store and flushed to
+products.view_count in batches, so product detail stays a pure read.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+REDIS_COUNTER_KEY = 'product-views'
+FLUSH_BATCH_SIZE = 1000
+
+FLUSH_SQL = """
+    UPDATE products AS p
+    SET view_count = p.view_count + v.delta
+    FROM (VALUES {values}) AS v(id, delta)
+    WHERE p.id = v.id
+"""
+
+
+# ============================================
+# COUNTER STORES
+# ============================================
+
+class LocalCounterStore:
+    """Per-process stand-in, flushed by a background thread"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, product_id, amount=1):
+        with self._lock:
+            self._counts[str(product_id)] += amount
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return dict(counts)
+
+    def restore(self, counts):
+        with self._lock:
+            self._counts.update(counts)
+
+
+class RedisCounterStore:
+    """Shared hash of pending increments, flushed by the flush_view_counts command"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def incr(self, product_id, amount=1):
+        self.client.hincrby(REDIS_COUNTER_KEY, str(product_id), amount)
+
+    def drain(self):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(REDIS_COUNTER_KEY)
+        pipe.delete(REDIS_COUNTER_KEY)
+        counts, _ = pipe.execute()
+        return {key.decode(): int(value) for key, value in counts.items()}
+
+    def restore(self, counts):
+        pipe = self.client.pipeline(transaction=False)
+        for product_id, amount in counts.items():
+            pipe.hincrby(REDIS_COUNTER_KEY, product_id, amount)
+        pipe.execute()
+
+
+_store = None
+_store_lock = threading.Lock()
+_flusher = None
+
+
+def get_counter_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.REDIS_URL:
+                    _store = RedisCounterStore(settings.REDIS_URL)
+                else:
+                    _store = LocalCounterStore()
+    return _store
+
+
+# ============================================
+# RECORD & FLUSH
+# ============================================
+
+def record_product_view(product_id):
+    """Buffer one view of a product"""
+    store = get_counter_store()
+    store.incr(product_id)
+    if isinstance(store, LocalCounterStore):
+        _ensure_local_flusher()
+
+
+def flush_view_counts():
+    """
+    Apply buffered views with one UPDATE ... FROM (VALUES ...) per batch.
+    Returns the number of products updated; counts are put back on failure.
+    """
+    store = get_counter_store()
+    counts = store.drain()
+    if not counts:
+        return 0
+
+    items = list(counts.items())
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                batch = items[start:start + FLUSH_BATCH_SIZE]
+                values = ', '.join(['(%s::uuid, %s::integer)'] * len(batch))
+                params = [value for item in batch for value in item]
+                cursor.execute(FLUSH_SQL.format(values=values), params)
+    except Exception:
+        store.restore(counts)
+        raise
+    return len(items)
+
+
+def _ensure_local_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _store_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_run_local_flusher, name='view-count-flusher', daemon=True
+            )
+            _flusher.start()
+
+
+def _run_local_flusher():
+    while True:
+        time.sleep(settings.VIEW_COUNT_FLUSH_INTERVAL)
+        try:
+            flush_view_counts()
+        except Exception:
+            logger.exception('Error al guardar contadores de visitas')
+        finally:
+            close_old_connections()
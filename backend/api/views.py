@@ -1,26 +1,74 @@
 """
 API Views for ProjectStore
 """
+import io
+from datetime import datetime, time
+
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, authentication_classes, parser_classes, permission_classes
+)
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Q, F
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import (
     User, Category, Product, Order, OrderItem,
-    Cart, CartItem, Review, StockMovement
+    Cart, Review, StockMovement
 )
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, LoginSerializer,
     CategorySerializer, ProductListSerializer, ProductDetailSerializer,
     ProductCreateUpdateSerializer, OrderListSerializer, OrderDetailSerializer,
-    OrderCreateSerializer, CartSerializer, CartItemSerializer,
-    ReviewSerializer, StockMovementSerializer
+    OrderCreateSerializer, CartSerializer, CartItemSerializer, CartSyncSerializer,
+    CartAddQuantitySerializer, CartUpdateQuantitySerializer,
+    ReviewSerializer, StockMovementSerializer, AnalyticsQuerySerializer,
+    ExportQuerySerializer
 )
 from .permissions import IsAdminUser, IsOwnerOrAdmin
+from .analytics import record_orders, revenue_series, sales_summary, top_categories, top_products
+from .cache import cached_catalog_response
+from .conditional import conditional_response, get_last_modified, make_etag
+from .carts import (
+    GUEST_CART_HEADER, GuestCart, add_to_cart, merge_guest_cart,
+    parse_item_id, serialize_cart, set_item_quantity, sync_cart, touch_cart
+)
+from .category_tree import get_category_index, get_category_subtree, get_category_tree
+from .exports import export_rows
+from .facets import get_facets
+from .fast_serializers import (
+    ORDER_LIST, PRODUCT_LIST, STOCK_MOVEMENT_LIST, fast_list_response, ordering_keys
+)
+from .inventory import InsufficientStock, OrderCancelled, apply_status_change
+from .pagination import OptInCursorPagination
+from .product_batch import PRODUCT_BATCH_MAX_SIZE, get_products, parse_keys
+from .product_import import ImportReport, detect_format, import_products
+from .product_reports import TOP_SELLING_SIZE, get_low_stock, get_top_selling
+from .ratings import STARS, rating_summary
+from .search import (
+    ProductSearchFilter, search_products, suggest_products,
+    SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT
+)
+from .sparse_fields import SparseFieldsMixin
+from .stock_ledger import stock_as_of
+from .storefront import (
+    HOME_FEED_CACHE_TIMEOUT, HOME_FEED_STALE_TIMEOUT,
+    featured_products, get_home_feed, recommended_products
+)
+from .view_counter import record_product_view
+
+
+# Catalog response cache (seconds); entries are also invalidated
+# by the catalog version on any Product/Category change
+CATALOG_CACHE_TIMEOUT = 60 * 5
 
 
 # ============================================
@@ -34,6 +82,7 @@ def register(request):
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
+        merge_guest_cart(user, request.headers.get(GUEST_CART_HEADER))
         refresh = RefreshToken.for_user(user)
         return Response({
             'user': UserSerializer(user).data,
@@ -55,10 +104,11 @@ def login(request):
         refresh = RefreshToken.for_user(user)
         
         # Update last login
-        from django.utils import timezone
         user.last_login = timezone.now()
         user.save(update_fields=['last_login'])
         
+        merge_guest_cart(user, request.headers.get(GUEST_CART_HEADER))
+        
         return Response({
             'user': UserSerializer(user).data,
             'tokens': {
@@ -80,10 +130,12 @@ def current_user(request):
 # CATEGORY VIEWSET
 # ============================================
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    """Category CRUD operations"""
+class CategoryViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    """Category CRUD operations (?fields= / ?omit= on list and detail)"""
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
+    # children is read from the cached category tree by slug
+    sparse_field_columns = {'children': ['slug']}
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
     
@@ -91,22 +143,73 @@ class CategoryViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsAdminUser()]
         return super().get_permissions()
+    
+    def list(self, request, *args, **kwargs):
+        """Category list, cached until a category or product changes"""
+        fingerprint = self.get_queryset().aggregate(
+            last_modified=Max('updated_at'), count=Count('id')
+        )
+        etag = make_etag(
+            'categories', fingerprint['last_modified'], fingerprint['count'],
+            request.get_full_path()
+        )
+        return conditional_response(
+            request,
+            lambda: cached_catalog_response(
+                'categories:list', request,
+                lambda: super(CategoryViewSet, self).list(request, *args, **kwargs),
+                timeout=CATALOG_CACHE_TIMEOUT
+            ),
+            etag, fingerprint['last_modified']
+        )
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ['list', 'retrieve']:
+            context['category_index'] = get_category_index()
+        return context
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Full category hierarchy (root categories with nested children)"""
+        return Response(get_category_tree())
+    
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, slug=None):
+        """Category with its nested children, served from the cached tree"""
+        node = get_category_subtree(slug)
+        if node is None:
+            return Response(
+                {'error': 'Category not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(node)
 
 
 # ============================================
 # PRODUCT VIEWSET
 # ============================================
 
-class ProductViewSet(viewsets.ModelViewSet):
-    """Product CRUD operations"""
-    queryset = Product.objects.select_related('category').filter(active=True)
+class ProductViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    """Product CRUD operations (?fields= / ?omit= on list, search, batch and detail)"""
+    queryset = Product.objects.select_related('category').defer('search_vector').filter(active=True)
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'featured', 'recommended', 'active']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProductSearchFilter]
+    filterset_fields = [
+        'category', 'featured', 'recommended', 'active',
+        'brand', 'color', 'size', 'material'
+    ]
+    # Matched through products.search_vector (see api/search.py)
     search_fields = ['name', 'description', 'tags']
     ordering_fields = ['created_at', 'price', 'rating', 'sales_count']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = OptInCursorPagination
+    sparse_field_columns = {
+        'final_price': ['price', 'discount'],
+        'available_stock': ['stock', 'reserved_stock'],
+        'is_low_stock': ['stock', 'min_stock'],
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -120,52 +223,182 @@ class ProductViewSet(viewsets.ModelViewSet):
             return [IsAdminUser()]
         return super().get_permissions()
     
+    def list(self, request, *args, **kwargs):
+        """Product list, cached until a category or product changes"""
+        return cached_catalog_response(
+            'products:list', request,
+            lambda: fast_list_response(self, PRODUCT_LIST.only(self.get_sparse_fields(PRODUCT_LIST.names))),
+            timeout=CATALOG_CACHE_TIMEOUT
+        )
+    
     def retrieve(self, request, *args, **kwargs):
-        """Increment view count on product detail"""
-        instance = self.get_object()
-        instance.view_count = F('view_count') + 1
-        instance.save(update_fields=['view_count'])
-        instance.refresh_from_db()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        """
+        Product detail; the view is buffered and flushed in batches.
+        Answers 304 when neither the product nor its category (the
+        response includes category_name) changed.
+        """
+        row = get_last_modified(
+            self.get_queryset(), related=['category'], slug=kwargs[self.lookup_field]
+        )
+        if row is None:
+            return super().retrieve(request, *args, **kwargs)
+        product_id, updated_at = row
+        record_product_view(product_id)
+        return conditional_response(
+            request,
+            lambda: Response(self.get_serializer(self.get_object()).data),
+            make_etag('product', product_id, updated_at), updated_at
+        )
     
     @action(detail=False, methods=['get'])
     def featured(self, request):
-        """Get featured products"""
-        products = self.queryset.filter(featured=True)
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        """Get featured products (stale-while-revalidate cache)"""
+        return cached_catalog_response(
+            'products:featured', request,
+            lambda: Response(featured_products()),
+            timeout=HOME_FEED_CACHE_TIMEOUT,
+            stale_timeout=HOME_FEED_STALE_TIMEOUT
+        )
     
     @action(detail=False, methods=['get'])
     def recommended(self, request):
-        """Get recommended products"""
-        products = self.queryset.filter(recommended=True)
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        """Get recommended products (stale-while-revalidate cache)"""
+        return cached_catalog_response(
+            'products:recommended', request,
+            lambda: Response(recommended_products()),
+            timeout=HOME_FEED_CACHE_TIMEOUT,
+            stale_timeout=HOME_FEED_STALE_TIMEOUT
+        )
+    
+    @action(detail=False, methods=['get'], url_path='top-selling')
+    def top_selling(self, request):
+        """Best-selling products (materialized, refreshed periodically)"""
+        try:
+            limit = int(request.query_params.get('limit', TOP_SELLING_SIZE))
+        except ValueError:
+            limit = TOP_SELLING_SIZE
+        return Response(get_top_selling(max(1, min(limit, TOP_SELLING_SIZE))))
+    
+    @action(detail=False, methods=['get'], url_path='low-stock', permission_classes=[IsAdminUser])
+    def low_stock(self, request):
+        """Products at or below their minimum stock (materialized, admin only)"""
+        return Response(get_low_stock())
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search products by name, description, or tags"""
-        query = request.query_params.get('q', '')
+        """Full-text search over name, tags and description, ranked by relevance"""
+        query = request.query_params.get('q', '').strip()
         if query:
-            products = self.queryset.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(tags__contains=[query])
+            products = search_products(self.get_queryset(), query)
+        else:
+            products = self.get_queryset().none()
+        fast_serializer = PRODUCT_LIST.only(self.get_sparse_fields(PRODUCT_LIST.names))
+        page = self.paginate_queryset(fast_serializer.values(products, ordering_keys(self, products)))
+        return self.get_paginated_response(fast_serializer.serialize(page))
+    
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Typeahead suggestions (id, name, slug, image) for a name prefix"""
+        try:
+            limit = int(request.query_params.get('limit', SUGGEST_DEFAULT_LIMIT))
+        except ValueError:
+            limit = SUGGEST_DEFAULT_LIMIT
+        limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+        return Response(suggest_products(request.query_params.get('q', ''), limit))
+    
+    @action(detail=False, methods=['get', 'post'], permission_classes=[AllowAny])
+    def batch(self, request):
+        """
+        Products by id or slug (?ids=a,b or {"ids": [...]}) in request
+        order, for cart and order hydration; keys with no active product
+        are listed under missing. Not counted as product views.
+        """
+        if request.method == 'POST':
+            values = request.data.get('ids', [])
+            if isinstance(values, str):
+                values = [values]
+        else:
+            values = request.query_params.getlist('ids')
+        if not isinstance(values, list):
+            return Response(
+                {'error': 'ids must be a list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        keys = parse_keys(values)
+        if not keys:
+            return Response(
+                {'error': 'ids is required'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            serializer = ProductListSerializer(products, many=True)
-            return Response(serializer.data)
-        return Response([])
+        if len(keys) > PRODUCT_BATCH_MAX_SIZE:
+            return Response(
+                {'error': f'At most {PRODUCT_BATCH_MAX_SIZE} ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        products, missing = get_products(keys)
+        names = self.get_sparse_fields(PRODUCT_LIST.names)
+        if names is not None:
+            products = [{name: product[name] for name in names} for product in products]
+        return Response({'results': products, 'missing': missing})
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Counts per category, brand, color, size, material and price for the current filters"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_facets(queryset, request.query_params))
+    
+    @action(detail=True, methods=['get'], url_path='rating-summary')
+    def rating_summary(self, request, slug=None):
+        """Average rating, review count and 1-5 star histogram"""
+        fields = ['id', 'rating', 'review_count'] + [f'rating_count_{star}' for star in STARS]
+        product = self.get_queryset().only(*fields).filter(slug=slug).first()
+        if product is None:
+            return Response(
+                {'error': 'Product not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(rating_summary(product))
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsAdminUser])
+    def stock(self, request, slug=None):
+        """Stock as of ?at= (date or datetime, default now), from the last snapshot plus the ledger tail"""
+        product = Product.objects.only('id', 'slug', 'stock').filter(slug=slug).first()
+        if product is None:
+            return Response(
+                {'error': 'Product not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        value = request.query_params.get('at')
+        at = timezone.now()
+        if value:
+            at = parse_datetime(value)
+            if at is None and parse_date(value):
+                # A date means the end of that day
+                at = datetime.combine(parse_date(value), time.max)
+            if at is None:
+                return Response(
+                    {'error': 'Invalid at (use YYYY-MM-DD or an ISO 8601 datetime)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        return Response({
+            'product': product.id,
+            'slug': product.slug,
+            'at': at,
+            'stock': stock_as_of(product, at),
+        })
 
 
 # ============================================
 # ORDER VIEWSET
 # ============================================
 
-class OrderViewSet(viewsets.ModelViewSet):
-    """Order CRUD operations"""
-    queryset = Order.objects.select_related('user').prefetch_related('items')
+class OrderViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    """Order CRUD operations (?fields= / ?omit= on list and detail)"""
+    queryset = Order.objects.select_related('user').prefetch_related('items').order_by('-created_at', '-id')
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInCursorPagination
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -180,6 +413,22 @@ class OrderViewSet(viewsets.ModelViewSet):
             return self.queryset
         return self.queryset.filter(user=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        return fast_list_response(self, ORDER_LIST.only(self.get_sparse_fields(ORDER_LIST.names)))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Order detail; answers 304 when the order's updated_at has not changed"""
+        row = get_last_modified(self.get_queryset(), pk=kwargs['pk'])
+        if row is None:
+            return super().retrieve(request, *args, **kwargs)
+        order_id, updated_at = row
+        return conditional_response(
+            request,
+            lambda: super(OrderViewSet, self).retrieve(request, *args, **kwargs),
+            make_etag('order', order_id, updated_at), updated_at,
+            private=True
+        )
+    
     @action(detail=True, methods=['patch'], permission_classes=[IsAdminUser])
     def update_status(self, request, pk=None):
         """Update order status (admin only)"""
@@ -190,9 +439,25 @@ class OrderViewSet(viewsets.ModelViewSet):
                 {'error': 'Invalid status'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        order.status = new_status
-        order.save(update_fields=['status', 'updated_at'])
+        try:
+            order = apply_status_change(order, new_status, request.user)
+        except OrderCancelled:
+            return Response(
+                {'error': 'Cancelled orders cannot be reopened'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except InsufficientStock:
+            return Response(
+                {'error': 'Insufficient stock'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         return Response(OrderDetailSerializer(order).data)
+    
+    def perform_destroy(self, instance):
+        """Delete order and remove it from the sales rollups"""
+        with transaction.atomic():
+            record_orders([instance], instance.status, None)
+            instance.delete()
 
 
 # ============================================
@@ -200,10 +465,20 @@ class OrderViewSet(viewsets.ModelViewSet):
 # ============================================
 
 class CartViewSet(viewsets.ModelViewSet):
-    """Shopping cart operations"""
+    """
+    Shopping cart operations. Guests use a cache-backed cart identified
+    by the X-Cart-Session header (item ids are product ids there).
+    """
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
     
+    GUEST_ACTIONS = ['list', 'retrieve', 'add_item', 'update_item', 'remove_item', 'sync', 'clear']
+    
+    def get_permissions(self):
+        if self.action in self.GUEST_ACTIONS:
+            return [AllowAny()]
+        return super().get_permissions()
+    
     def get_queryset(self):
         """Get user's active cart"""
         return Cart.objects.filter(user=self.request.user, is_active=True)
@@ -216,78 +491,120 @@ class CartViewSet(viewsets.ModelViewSet):
         )
         return cart
     
+    def get_guest_cart(self):
+        """Anonymous cart for the request's session id (a new one if missing)"""
+        return GuestCart(self.request.headers.get(GUEST_CART_HEADER))
+    
+    def guest_response(self, guest):
+        return Response(guest.serialize(), headers={GUEST_CART_HEADER: str(guest.session_id)})
+    
+    def item_not_found(self):
+        return Response(
+            {'error': 'Cart item not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    def list(self, request, *args, **kwargs):
+        """The user's active cart"""
+        if not request.user.is_authenticated:
+            return self.guest_response(self.get_guest_cart())
+        return Response(serialize_cart(self.get_object()))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """The user's active cart"""
+        return self.list(request, *args, **kwargs)
+    
     @action(detail=False, methods=['post'])
     def add_item(self, request):
         """Add item to cart"""
-        cart = self.get_object()
         product_id = request.data.get('product_id')
-        quantity = request.data.get('quantity', 1)
+        serializer = CartAddQuantitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data['quantity']
         
         try:
             product = Product.objects.get(id=product_id, active=True)
-        except Product.DoesNotExist:
+        except (Product.DoesNotExist, ValueError, ValidationError):
             return Response(
                 {'error': 'Product not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
+        if not request.user.is_authenticated:
+            guest = self.get_guest_cart()
+            guest.add(product.id, quantity)
+            return self.guest_response(guest)
         
-        return Response(CartSerializer(cart).data)
+        cart = self.get_object()
+        add_to_cart(cart, product, quantity)
+        return Response(serialize_cart(cart))
     
     @action(detail=False, methods=['patch'])
     def update_item(self, request):
         """Update cart item quantity"""
-        cart = self.get_object()
         item_id = request.data.get('item_id')
-        quantity = request.data.get('quantity')
+        serializer = CartUpdateQuantitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data['quantity']
         
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-            if quantity <= 0:
-                cart_item.delete()
-            else:
-                cart_item.quantity = quantity
-                cart_item.save()
-        except CartItem.DoesNotExist:
-            return Response(
-                {'error': 'Cart item not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        if not request.user.is_authenticated:
+            guest = self.get_guest_cart()
+            if not guest.update(parse_item_id(item_id), quantity):
+                return self.item_not_found()
+            return self.guest_response(guest)
         
-        return Response(CartSerializer(cart).data)
+        cart = self.get_object()
+        item_id = parse_item_id(item_id)
+        if item_id is None or not set_item_quantity(cart, item_id, quantity):
+            return self.item_not_found()
+        return Response(serialize_cart(cart))
     
     @action(detail=False, methods=['delete'])
     def remove_item(self, request):
         """Remove item from cart"""
-        cart = self.get_object()
         item_id = request.data.get('item_id')
         
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-            cart_item.delete()
-        except CartItem.DoesNotExist:
-            return Response(
-                {'error': 'Cart item not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        if not request.user.is_authenticated:
+            guest = self.get_guest_cart()
+            if not guest.remove(parse_item_id(item_id)):
+                return self.item_not_found()
+            return self.guest_response(guest)
         
-        return Response(CartSerializer(cart).data)
+        cart = self.get_object()
+        item_id = parse_item_id(item_id)
+        if item_id is None or not set_item_quantity(cart, item_id, 0):
+            return self.item_not_found()
+        return Response(serialize_cart(cart))
+    
+    @action(detail=False, methods=['put'])
+    def sync(self, request):
+        """Replace the cart (or apply quantity deltas) in one request"""
+        serializer = CartSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lines = serializer.validated_data['lines']
+        mode = serializer.validated_data['mode']
+        
+        if not request.user.is_authenticated:
+            guest = self.get_guest_cart()
+            guest.sync(lines, mode)
+            return self.guest_response(guest)
+        
+        cart = self.get_object()
+        sync_cart(cart, lines, mode)
+        return Response(serialize_cart(cart))
     
     @action(detail=False, methods=['post'])
     def clear(self, request):
         """Clear all items from cart"""
+        if not request.user.is_authenticated:
+            guest = self.get_guest_cart()
+            guest.clear()
+            return self.guest_response(guest)
+        
         cart = self.get_object()
         cart.items.all().delete()
-        return Response(CartSerializer(cart).data)
+        touch_cart(cart)
+        return Response(serialize_cart(cart))
 
 
 # ============================================
@@ -301,7 +618,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['product', 'rating']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = OptInCursorPagination
     
     def get_permissions(self):
         if self.action in ['update', 'partial_update', 'destroy']:
@@ -310,16 +628,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated()]
         return super().get_permissions()
     
+    # Rating aggregates are kept by the Review signal handlers (api/signals.py)
+    
     def perform_create(self, serializer):
-        """Create review and update product rating"""
-        review = serializer.save()
-        product = review.product
-        
-        # Recalculate product rating
-        reviews = product.reviews.all()
-        product.rating = sum(r.rating for r in reviews) / reviews.count()
-        product.review_count = reviews.count()
-        product.save(update_fields=['rating', 'review_count'])
+        """Create review (added to the product's rating aggregates)"""
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_update(self, serializer):
+        """Update review; the row lock keeps the stored rating the signals read current"""
+        with transaction.atomic():
+            Review.objects.select_for_update().filter(pk=serializer.instance.pk).exists()
+            serializer.save()
+    
+    def perform_destroy(self, instance):
+        """Delete review (removed from the product's rating aggregates)"""
+        with transaction.atomic():
+            row = Review.objects.select_for_update().filter(pk=instance.pk).values_list(
+                'product_id', 'rating'
+            ).first()
+            if row is None:
+                return
+            # post_delete removes the rating as stored, not as first loaded
+            instance.product_id, instance.rating = row
+            instance.delete()
 
 
 # ============================================
@@ -332,5 +664,151 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = StockMovementSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['product', 'type']
-    ordering = ['-created_at']
+    # Bounding created_at lets PostgreSQL skip the monthly partitions out of range
+    filterset_fields = {
+        'product': ['exact'],
+        'type': ['exact'],
+        'created_at': ['gte', 'lt'],
+    }
+    ordering = ['-created_at', '-id']
+    pagination_class = OptInCursorPagination
+    
+    def list(self, request, *args, **kwargs):
+        return fast_list_response(self, STOCK_MOVEMENT_LIST)
+
+
+# ============================================
+# STOREFRONT
+# ============================================
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def storefront_home(request):
+    """
+    Home feed in one request: categories, featured, recommended,
+    top-selling and newest products (public, cached as a whole)
+    """
+    return Response(get_home_feed())
+
+
+# ============================================
+# ADMIN ANALYTICS
+# ============================================
+
+def analytics_params(request):
+    """Validated analytics query params (raises 400 on bad input)"""
+    serializer = AnalyticsQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def analytics_summary(request):
+    """Revenue, orders, average order value and orders by status"""
+    params = analytics_params(request)
+    return Response(sales_summary(params.get('date_from'), params.get('date_to')))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def analytics_revenue(request):
+    """Revenue per day, week or month"""
+    params = analytics_params(request)
+    return Response(revenue_series(
+        params['period'], params.get('date_from'), params.get('date_to')
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def analytics_top_products(request):
+    """Best-selling products (by units unless order_by=revenue)"""
+    params = analytics_params(request)
+    return Response(top_products(
+        params['limit'], params.get('order_by', 'quantity'),
+        params.get('date_from'), params.get('date_to')
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def analytics_top_categories(request):
+    """Best-selling categories (by revenue unless order_by=quantity)"""
+    params = analytics_params(request)
+    return Response(top_categories(
+        params['limit'], params.get('order_by', 'revenue'),
+        params.get('date_from'), params.get('date_to')
+    ))
+
+
+# ============================================
+# ADMIN IMPORT
+# ============================================
+
+# Errors listed in the response; the rest are only counted
+IMPORT_MAX_ERRORS = 1000
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_products_view(request):
+    """
+    Upsert products (by sku) from an uploaded CSV or JSONL file.
+    Meant for files of a few thousand rows; use the import_products
+    command for full catalogs.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'file is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        fmt = detect_format(upload.name, request.data.get('format'))
+    except ValueError:
+        return Response(
+            {'error': 'Unsupported format (use csv or jsonl)'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        report = import_products(stream, fmt, report=ImportReport(max_errors=IMPORT_MAX_ERRORS))
+    except UnicodeDecodeError:
+        return Response(
+            {'error': 'File must be UTF-8 encoded'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(report.as_dict())
+
+
+# ============================================
+# ADMIN EXPORT
+# ============================================
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_data(request, dataset):
+    """
+    Stream a dataset as CSV (default) or JSON lines (?output=jsonl),
+    filtered by date_from / date_to and status (orders, order items)
+    or type (stock movements)
+    """
+    serializer = ExportQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    
+    chunks, content_type = export_rows(
+        dataset, params['output'],
+        date_from=params.get('date_from'),
+        date_to=params.get('date_to'),
+        statuses=params.get('status'),
+        types=params.get('type')
+    )
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    filename = f"{dataset}-{timezone.localdate():%Y%m%d}.{params['output']}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
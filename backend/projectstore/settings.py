@@ -6,6 +6,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -31,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -90,6 +93,43 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared Redis cache when REDIS_URL is set, per-process memory otherwise
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'projectstore',
+        }
+    }
+
+
+# Seconds between flushes of buffered product views (see api/view_counter.py)
+VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', '10'))
+
+
+# Order numbers reserved per worker from order_number_seq (see api/order_numbers.py)
+ORDER_NUMBER_BLOCK_SIZE = int(os.environ.get('ORDER_NUMBER_BLOCK_SIZE', '50'))
+
+
+# Minutes a pending order holds its reserved stock (see api/inventory.py)
+STOCK_RESERVATION_MINUTES = int(os.environ.get('STOCK_RESERVATION_MINUTES', '30'))
+
+
+# Days an untouched guest cart is kept in the cache (see api/carts.py)
+GUEST_CART_DAYS = int(os.environ.get('GUEST_CART_DAYS', '7'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -170,6 +210,11 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Guest cart id, sent by the client and returned on cart responses
+CORS_ALLOW_HEADERS = [*default_headers, 'x-cart-session']
+# Plus the approximate total of cursor-paginated lists
+CORS_EXPOSE_HEADERS = ['X-Cart-Session', 'X-Approximate-Count']
+
 # API Documentation
 SPECTACULAR_SETTINGS = {
     'TITLE': 'ProjectStore API',
@@ -9,6 +9,13 @@
 -- ============================================
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "unaccent";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- Configuración de búsqueda en español sin acentos (búsqueda full-text)
+CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
 
 -- ============================================
 -- 1. TABLA DE USUARIOS
@@ -108,6 +115,7 @@ CREATE TABLE products (
     price DECIMAL(10, 2) NOT NULL CHECK (price >= 0),
     discount DECIMAL(5, 2) DEFAULT 0 CHECK (discount >= 0 AND discount <= 100),
     stock INTEGER DEFAULT 0 CHECK (stock >= 0),
+    reserved_stock INTEGER DEFAULT 0 CHECK (reserved_stock >= 0), -- Reservado por órdenes pendientes
     
     -- Código único del producto (ProductModal.tsx - campo sku)
     sku VARCHAR(100) UNIQUE,
@@ -149,13 +157,22 @@ CREATE TABLE products (
     view_count INTEGER DEFAULT 0,
     sales_count INTEGER DEFAULT 0,
     
-    -- Calificaciones (calculadas desde reviews)
+    -- Calificaciones (agregados incrementales mantenidos por el API)
     rating DECIMAL(3, 2) DEFAULT 0 CHECK (rating >= 0 AND rating <= 5),
     review_count INTEGER DEFAULT 0,
+    rating_sum INTEGER DEFAULT 0,
+    rating_count_1 INTEGER DEFAULT 0,
+    rating_count_2 INTEGER DEFAULT 0,
+    rating_count_3 INTEGER DEFAULT 0,
+    rating_count_4 INTEGER DEFAULT 0,
+    rating_count_5 INTEGER DEFAULT 0,
     
     -- Stock mínimo para alertas
     min_stock INTEGER DEFAULT 5 CHECK (min_stock >= 0),
     
+    -- Búsqueda full-text (mantenido por trigger: name > tags > description)
+    search_vector TSVECTOR,
+    
     -- Metadatos
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -179,11 +196,20 @@ CREATE INDEX idx_products_name_trgm ON products USING gin(name gin_trgm_ops);
 CREATE INDEX idx_products_sales_count ON products(sales_count DESC);
 CREATE INDEX idx_products_view_count ON products(view_count DESC);
 CREATE INDEX idx_products_rating ON products(rating DESC);
+CREATE INDEX idx_products_search_vector ON products USING GIN(search_vector);
+CREATE INDEX idx_products_created_at_id ON products(created_at DESC, id DESC);
+-- Parciales que alimentan las vistas materializadas de reportes
+CREATE INDEX idx_products_top_selling ON products(sales_count DESC, rating DESC) WHERE active = true;
+-- Cubre low_stock_products sin leer la tabla (index-only scan)
+CREATE INDEX idx_products_low_stock ON products(stock)
+    INCLUDE (name, sku, min_stock, category_id)
+    WHERE active = true AND stock <= min_stock;
 
 COMMENT ON TABLE products IS 'Catálogo de productos con información completa';
 COMMENT ON COLUMN products.active IS 'Si el producto está activo y visible';
 COMMENT ON COLUMN products.discount IS 'Porcentaje de descuento (0-100)';
 COMMENT ON COLUMN products.tags IS 'Array de etiquetas para búsqueda y filtrado';
+COMMENT ON COLUMN products.search_vector IS 'Vector de búsqueda full-text ponderado (A: nombre, B: tags, C: descripción)';
 
 -- ============================================
 -- 4. TABLA DE ÓRDENES
@@ -222,6 +248,9 @@ CREATE TABLE orders (
     notes TEXT,
     admin_notes TEXT, -- Notas internas del administrador
     
+    -- Reserva de stock mientras la orden está pendiente
+    reserved_until TIMESTAMP WITH TIME ZONE,
+    
     -- Fechas importantes
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -233,10 +262,13 @@ CREATE TABLE orders (
 CREATE INDEX idx_orders_order_number ON orders(order_number);
 CREATE INDEX idx_orders_user_id ON orders(user_id);
 CREATE INDEX idx_orders_status ON orders(status);
-CREATE INDEX idx_orders_created_at ON orders(created_at DESC);
+CREATE INDEX idx_orders_created_at_id ON orders(created_at DESC, id DESC);
+CREATE INDEX idx_orders_user_created_at_id ON orders(user_id, created_at DESC, id DESC);
 CREATE INDEX idx_orders_customer_phone ON orders(customer_phone);
 CREATE INDEX idx_orders_customer_email ON orders(customer_email);
 CREATE INDEX idx_orders_customer_name ON orders(customer_name);
+CREATE INDEX idx_orders_reserved_until ON orders(reserved_until)
+    WHERE status = 'pending' AND reserved_until IS NOT NULL;
 
 COMMENT ON TABLE orders IS 'Órdenes de compra con información de cliente y envío';
 COMMENT ON COLUMN orders.order_number IS 'Número único de orden (generado automáticamente)';
@@ -365,7 +397,8 @@ CREATE TABLE reviews (
 CREATE INDEX idx_reviews_product_id ON reviews(product_id);
 CREATE INDEX idx_reviews_user_id ON reviews(user_id);
 CREATE INDEX idx_reviews_rating ON reviews(rating);
-CREATE INDEX idx_reviews_created_at ON reviews(created_at DESC);
+CREATE INDEX idx_reviews_created_at_id ON reviews(created_at DESC, id DESC);
+CREATE INDEX idx_reviews_product_created_at_id ON reviews(product_id, created_at DESC, id DESC);
 
 COMMENT ON TABLE reviews IS 'Reseñas y calificaciones de productos';
 
@@ -373,9 +406,13 @@ COMMENT ON TABLE reviews IS 'Reseñas y calificaciones de productos';
 -- 9. TABLA DE MOVIMIENTOS DE STOCK
 -- Basado en: ProductContext.tsx (updateStock, getStockMovements)
 -- AdminDashboard.tsx muestra movimientos de inventario
+-- Particionada por mes según created_at (stock_movements_yAAAAmMM).
+-- Las particiones futuras las crea: python manage.py maintain_stock_ledger --loop
+-- Los meses antiguos se separan sin bloquear escrituras con:
+-- python manage.py archive_stock_movements --before AAAA-MM
 -- ============================================
 CREATE TABLE stock_movements (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     product_id UUID NOT NULL,
     
     -- Tipo de movimiento (ProductContext.tsx: 'in', 'out', 'adjustment')
@@ -395,21 +432,61 @@ CREATE TABLE stock_movements (
     
     -- Usuario que realizó el movimiento
     created_by UUID,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
+    -- La clave primaria de una tabla particionada debe incluir la columna de partición
+    PRIMARY KEY (id, created_at),
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
-);
+) PARTITION BY RANGE (created_at);
 
--- Índices para stock_movements
+-- Particiones del mes actual y los tres siguientes, con límites de mes en
+-- UTC. Sin partición DEFAULT: DETACH PARTITION ... CONCURRENTLY no la admite.
+DO $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', now() AT TIME ZONE 'UTC');
+BEGIN
+    FOR i IN 0..3 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF stock_movements FOR VALUES FROM (%L) TO (%L)',
+            'stock_movements_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start AT TIME ZONE 'UTC',
+            (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC'
+        );
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+END $$;
+
+-- Índices para stock_movements (se crean en cada partición)
 CREATE INDEX idx_stock_movements_product_id ON stock_movements(product_id);
 CREATE INDEX idx_stock_movements_type ON stock_movements(type);
-CREATE INDEX idx_stock_movements_created_at ON stock_movements(created_at DESC);
+CREATE INDEX idx_stock_movements_created_at_id ON stock_movements(created_at DESC, id DESC);
+CREATE INDEX idx_stock_movements_product_created_at_id ON stock_movements(product_id, created_at DESC, id DESC);
 CREATE INDEX idx_stock_movements_reference ON stock_movements(reference_type, reference_id);
 
 COMMENT ON TABLE stock_movements IS 'Historial de movimientos de inventario';
 COMMENT ON COLUMN stock_movements.type IS 'Tipo: in (entrada), out (salida), adjustment (ajuste), sale (venta), return (devolución)';
 
+-- Saldo de cada producto en cada corte periódico (solo los productos que
+-- tuvieron movimientos desde el corte anterior). El stock a una fecha es
+-- el último snapshot anterior más los movimientos posteriores, aunque los
+-- meses antiguos ya estén archivados (api/stock_ledger.py)
+CREATE TABLE stock_snapshots (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    product_id UUID NOT NULL,
+    taken_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    stock INTEGER NOT NULL,
+    
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+    
+    UNIQUE(product_id, taken_at)
+);
+
+CREATE INDEX idx_stock_snapshots_product_taken_at ON stock_snapshots(product_id, taken_at DESC);
+CREATE INDEX idx_stock_snapshots_taken_at ON stock_snapshots(taken_at DESC);
+
+COMMENT ON TABLE stock_snapshots IS 'Saldos de stock por producto en cortes periódicos';
+
 -- ============================================
 -- 10. TABLA DE SESIONES
 -- Para manejo de autenticación JWT
@@ -442,6 +519,47 @@ CREATE INDEX idx_sessions_is_active ON sessions(is_active);
 
 COMMENT ON TABLE sessions IS 'Sesiones de usuario activas para autenticación';
 
+-- ============================================
+-- 11. TABLAS DE VENTAS DIARIAS (ANALÍTICA)
+-- Dashboard.tsx: ingresos, órdenes por estado, top productos/categorías
+-- Se mantienen de forma incremental desde el API (api/analytics.py)
+-- Reconstrucción: python manage.py rebuild_sales_rollup
+-- ============================================
+CREATE TABLE daily_sales_rollup (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    
+    -- Día de creación de la orden y su estado actual
+    date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    
+    UNIQUE(date, status)
+);
+
+COMMENT ON TABLE daily_sales_rollup IS 'Órdenes y total vendido por día y estado';
+
+CREATE TABLE daily_product_sales (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    date DATE NOT NULL,
+    product_id UUID NOT NULL,
+    category_id UUID,
+    
+    -- Solo órdenes confirmadas, en tránsito o entregadas
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL,
+    
+    UNIQUE(date, product_id)
+);
+
+CREATE INDEX idx_daily_product_sales_date_category ON daily_product_sales(date, category_id);
+
+COMMENT ON TABLE daily_product_sales IS 'Unidades y total vendido por día y producto';
+
 -- ============================================
 -- FUNCIONES Y TRIGGERS
 -- ============================================
@@ -464,8 +582,15 @@ CREATE TRIGGER update_categories_updated_at
     BEFORE UPDATE ON categories
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- view_count no actualiza updated_at: es una métrica y updated_at
+-- alimenta los ETag / Last-Modified del API
 CREATE TRIGGER update_products_updated_at 
-    BEFORE UPDATE ON products
+    BEFORE UPDATE OF name, slug, description, category_id, price, discount, stock,
+        reserved_stock, sku, image, images, brand, color, size, material, weight, dimensions,
+        warranty, shipping, returns, features, tags, active, featured, recommended,
+        original_price, offer_start_date, offer_end_date, sales_count, rating,
+        review_count, rating_sum, rating_count_1, rating_count_2, rating_count_3,
+        rating_count_4, rating_count_5, min_stock, created_by ON products
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 CREATE TRIGGER update_orders_updated_at 
@@ -486,6 +611,7 @@ CREATE TRIGGER update_reviews_updated_at
 
 -- Función para generar número de orden único
 CREATE SEQUENCE IF NOT EXISTS order_number_seq START 1;
+COMMENT ON SEQUENCE order_number_seq IS 'Números de orden; el backend reserva bloques por worker (api/order_numbers.py)';
 
 CREATE OR REPLACE FUNCTION generate_order_number()
 RETURNS TRIGGER AS $$
@@ -509,6 +635,10 @@ COMMENT ON FUNCTION generate_order_number() IS 'Genera número de orden único e
 CREATE OR REPLACE FUNCTION log_stock_movement()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- El backend registra sus propios movimientos (api/inventory.py)
+    IF current_setting('projectstore.skip_stock_log', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
     IF TG_OP = 'UPDATE' AND OLD.stock != NEW.stock THEN
         INSERT INTO stock_movements (
             product_id,
@@ -534,37 +664,17 @@ END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER log_product_stock_movement
-    AFTER UPDATE ON products
+    AFTER UPDATE OF stock ON products
     FOR EACH ROW EXECUTE FUNCTION log_stock_movement();
 
 COMMENT ON FUNCTION log_stock_movement() IS 'Registra automáticamente movimientos de stock cuando cambia el inventario';
 
--- Función para actualizar rating de productos
-CREATE OR REPLACE FUNCTION update_product_rating()
-RETURNS TRIGGER AS $$
-BEGIN
-    UPDATE products
-    SET 
-        rating = (
-            SELECT COALESCE(ROUND(AVG(rating)::numeric, 2), 0) 
-            FROM reviews 
-            WHERE product_id = COALESCE(NEW.product_id, OLD.product_id)
-        ),
-        review_count = (
-            SELECT COUNT(*) 
-            FROM reviews 
-            WHERE product_id = COALESCE(NEW.product_id, OLD.product_id)
-        )
-    WHERE id = COALESCE(NEW.product_id, OLD.product_id);
-    RETURN COALESCE(NEW, OLD);
-END;
-$$ LANGUAGE plpgsql;
-
-CREATE TRIGGER update_product_rating_on_review
-    AFTER INSERT OR UPDATE OR DELETE ON reviews
-    FOR EACH ROW EXECUTE FUNCTION update_product_rating();
-
-COMMENT ON FUNCTION update_product_rating() IS 'Actualiza rating promedio y contador de reviews cuando se modifica una reseña';
+-- rating, review_count, rating_sum y rating_count_1..5 se actualizan de
+-- forma incremental (api/ratings.py, desde los signals de Review) al
+-- crear, editar o borrar una reseña por cualquier vía (API, admin o
+-- borrado en cascada de su usuario o producto): un UPDATE con deltas en lugar de recalcular
+-- AVG/COUNT sobre todas las reseñas del producto.
+-- Para recalcularlos desde cero: python manage.py rebuild_rating_aggregates
 
 -- Función para actualizar sales_count al completar orden
 CREATE OR REPLACE FUNCTION update_product_sales()
@@ -586,25 +696,9 @@ CREATE TRIGGER update_product_sales_on_order
 
 COMMENT ON FUNCTION update_product_sales() IS 'Incrementa contador de ventas cuando orden es entregada';
 
--- Función para reducir stock al confirmar orden
-CREATE OR REPLACE FUNCTION reduce_stock_on_order()
-RETURNS TRIGGER AS $$
-BEGIN
-    IF NEW.status = 'confirmed' AND (OLD IS NULL OR OLD.status = 'pending') THEN
-        UPDATE products p
-        SET stock = stock - oi.quantity
-        FROM order_items oi
-        WHERE oi.order_id = NEW.id AND p.id = oi.product_id;
-    END IF;
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
-
-CREATE TRIGGER reduce_stock_on_order_confirm
-    AFTER INSERT OR UPDATE ON orders
-    FOR EACH ROW EXECUTE FUNCTION reduce_stock_on_order();
-
-COMMENT ON FUNCTION reduce_stock_on_order() IS 'Reduce stock de productos cuando orden es confirmada';
+-- El stock de las órdenes se reserva al crear la orden y se descuenta al
+-- confirmarla desde el backend (api/inventory.py), con bloqueo por fila
+-- y registro de movimientos en lote
 
 -- Función para generar slug automáticamente
 CREATE OR REPLACE FUNCTION generate_slug()
@@ -621,15 +715,33 @@ END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER generate_product_slug
-    BEFORE INSERT OR UPDATE ON products
+    BEFORE INSERT OR UPDATE OF name, slug ON products
     FOR EACH ROW EXECUTE FUNCTION generate_slug();
 
 CREATE TRIGGER generate_category_slug
-    BEFORE INSERT OR UPDATE ON categories
+    BEFORE INSERT OR UPDATE OF name, slug ON categories
     FOR EACH ROW EXECUTE FUNCTION generate_slug();
 
 COMMENT ON FUNCTION generate_slug() IS 'Genera slug URL-friendly a partir del nombre';
 
+-- Función para mantener el vector de búsqueda full-text de productos
+CREATE OR REPLACE FUNCTION update_product_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish_unaccent', COALESCE(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('spanish_unaccent', COALESCE(array_to_string(NEW.tags, ' '), '')), 'B') ||
+        setweight(to_tsvector('spanish_unaccent', COALESCE(NEW.description, '')), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_product_search_vector
+    BEFORE INSERT OR UPDATE OF name, tags, description ON products
+    FOR EACH ROW EXECUTE FUNCTION update_product_search_vector();
+
+COMMENT ON FUNCTION update_product_search_vector() IS 'Recalcula search_vector cuando cambian nombre, tags o descripción';
+
 -- ============================================
 -- VISTAS ÚTILES
 -- ============================================
@@ -668,48 +780,12 @@ GROUP BY o.id, u.email, u.name;
 
 COMMENT ON VIEW orders_with_details IS 'Vista de órdenes con información del usuario y contadores';
 
--- Vista de productos más vendidos
-CREATE OR REPLACE VIEW top_selling_products AS
-SELECT 
-    p.id,
-    p.name,
-    p.slug,
-    p.image,
-    p.price,
-    p.discount,
-    p.stock,
-    p.sales_count,
-    p.rating,
-    p.review_count,
-    c.name as category_name,
-    CASE 
-        WHEN p.discount > 0 THEN ROUND(p.price * (1 - p.discount/100), 2)
-        ELSE p.price
-    END as final_price
-FROM products p
-LEFT JOIN categories c ON p.category_id = c.id
-WHERE p.active = true
-ORDER BY p.sales_count DESC, p.rating DESC
-LIMIT 20;
-
-COMMENT ON VIEW top_selling_products IS 'Top 20 productos más vendidos activos';
-
--- Vista de productos con bajo stock
-CREATE OR REPLACE VIEW low_stock_products AS
-SELECT 
-    p.id,
-    p.name,
-    p.sku,
-    p.stock,
-    p.min_stock,
-    c.name as category_name
-FROM products p
-LEFT JOIN categories c ON p.category_id = c.id
-WHERE p.active = true 
-  AND p.stock <= p.min_stock
-ORDER BY p.stock ASC;
-
-COMMENT ON VIEW low_stock_products IS 'Productos activos con stock bajo o agotado';
+-- Vistas materializadas top_selling_products y low_stock_products.
+-- Su definición está solo en backend/api/product_reports.py: las crea (y
+-- reemplaza las antiguas vistas normales del mismo nombre) el comando
+-- python manage.py refresh_product_reports, que corre al iniciar el
+-- backend y las actualiza con REFRESH MATERIALIZED VIEW CONCURRENTLY
+-- (sin bloquear lecturas) con --loop.
 
 -- ============================================
 -- DATOS INICIALES
@@ -50,8 +50,8 @@ export function ProductCatalog({ onLoginRequired, onProductClick }: ProductCatal
     if (priceRange !== 'all') {
       products = products.filter(p => {
         if (priceRange === 'low') return p.price < 300;
-        if (priceRange === 'mid') return p.price >= 300 && p.price <= 1000;
-        if (priceRange === 'high') return p.price > 1000;
+        if (priceRange === 'mid') return p.price >= 300 && p.price < 1000;
+        if (priceRange === 'high') return p.price >= 1000;
         return true;
       });
     }
@@ -76,6 +76,28 @@ class TokenManager {
   }
 }
 
+// ============================================
+// GUEST CART SESSION
+// ============================================
+
+// Id of the server-side guest cart; merged into the user's cart on login
+class CartSession {
+  private static KEY = 'cart_session';
+  static HEADER = 'X-Cart-Session';
+
+  static get(): string | null {
+    return localStorage.getItem(this.KEY);
+  }
+
+  static set(id: string): void {
+    localStorage.setItem(this.KEY, id);
+  }
+
+  static clear(): void {
+    localStorage.removeItem(this.KEY);
+  }
+}
+
 // ============================================
 // HTTP CLIENT
 // ============================================
@@ -98,11 +120,19 @@ async function fetchApi<T = any>(
     headers: customHeaders = {},
   } = options;
 
+  // File uploads: the browser sets the multipart Content-Type itself
+  const isFormData = body instanceof FormData;
+
   const headers: HeadersInit = {
-    'Content-Type': 'application/json',
+    ...(isFormData ? {} : { 'Content-Type': 'application/json' }),
     ...customHeaders,
   };
 
+  const cartSession = CartSession.get();
+  if (cartSession) {
+    headers[CartSession.HEADER] = cartSession;
+  }
+
   // Add auth token if required
   if (requiresAuth) {
     const token = TokenManager.getAccessToken();
@@ -117,7 +147,7 @@ async function fetchApi<T = any>(
   };
 
   if (body) {
-    config.body = JSON.stringify(body);
+    config.body = isFormData ? body : JSON.stringify(body);
   }
 
   try {
@@ -132,6 +162,11 @@ async function fetchApi<T = any>(
       }
     }
 
+    const newCartSession = response.headers.get(CartSession.HEADER);
+    if (newCartSession) {
+      CartSession.set(newCartSession);
+    }
+
     const data = await response.json();
 
     if (!response.ok) {
@@ -156,6 +191,7 @@ export const authApi = {
       body: { email, password, password_confirm: password, name, phone },
     });
     TokenManager.setTokens(response.tokens.access, response.tokens.refresh);
+    CartSession.clear();
     return response.user;
   },
 
@@ -165,6 +201,7 @@ export const authApi = {
       body: { email, password },
     });
     TokenManager.setTokens(response.tokens.access, response.tokens.refresh);
+    CartSession.clear();
     return response.user;
   },
 
@@ -186,17 +223,22 @@ export const authApi = {
 // ============================================
 
 export const productsApi = {
-  getAll: (params?: { active?: boolean; category?: string; search?: string }) => {
+  getAll: (params?: { active?: boolean; category?: string; search?: string; fields?: string[] }) => {
     const queryParams = new URLSearchParams();
     if (params?.active !== undefined) queryParams.append('active', String(params.active));
     if (params?.category) queryParams.append('category', params.category);
     if (params?.search) queryParams.append('search', params.search);
+    if (params?.fields?.length) queryParams.append('fields', params.fields.join(','));
     
     const query = queryParams.toString();
     return fetchApi(`/products/${query ? `?${query}` : ''}`);
   },
 
-  getBySlug: (slug: string) => fetchApi(`/products/${slug}/`),
+  getBySlug: (slug: string, fields?: string[]) =>
+    fetchApi(`/products/${slug}/${fields?.length ? `?fields=${fields.join(',')}` : ''}`),
+
+  getBatch: (ids: string[]) =>
+    fetchApi('/products/batch/', { method: 'POST', body: { ids } }),
 
   getFeatured: () => fetchApi('/products/featured/'),
 
@@ -204,6 +246,39 @@ export const productsApi = {
 
   search: (query: string) => fetchApi(`/products/search/?q=${encodeURIComponent(query)}`),
 
+  suggest: (query: string, limit: number = 8) =>
+    fetchApi(`/products/suggest/?q=${encodeURIComponent(query)}&limit=${limit}`),
+
+  getFacets: (params?: Record<string, string>) => {
+    const query = new URLSearchParams(params).toString();
+    return fetchApi(`/products/facets/${query ? `?${query}` : ''}`);
+  },
+
+  getRatingSummary: (slug: string) => fetchApi(`/products/${slug}/rating-summary/`),
+
+  getTopSelling: (limit?: number) =>
+    fetchApi(`/products/top-selling/${limit ? `?limit=${limit}` : ''}`),
+
+  getLowStock: () => fetchApi('/products/low-stock/', { requiresAuth: true }),
+
+  getStockAsOf: (slug: string, at?: string) =>
+    fetchApi(`/products/${slug}/stock/${at ? `?at=${encodeURIComponent(at)}` : ''}`, {
+      requiresAuth: true,
+    }),
+
+  importFile: (file: File, format?: 'csv' | 'jsonl') => {
+    const body = new FormData();
+    body.append('file', file);
+    if (format) {
+      body.append('format', format);
+    }
+    return fetchApi('/admin/import/products/', {
+      method: 'POST',
+      body,
+      requiresAuth: true,
+    });
+  },
+
   create: (data: any) =>
     fetchApi('/products/', {
       method: 'POST',
@@ -234,6 +309,10 @@ export const categoriesApi = {
 
   getBySlug: (slug: string) => fetchApi(`/categories/${slug}/`),
 
+  getTree: () => fetchApi('/categories/tree/'),
+
+  getSubtree: (slug: string) => fetchApi(`/categories/${slug}/subtree/`),
+
   create: (data: any) =>
     fetchApi('/categories/', {
       method: 'POST',
@@ -307,6 +386,16 @@ export const cartApi = {
       requiresAuth: true,
     }),
 
+  sync: (
+    items: Array<{ product_id: string; quantity: number }>,
+    mode: 'replace' | 'delta' = 'replace'
+  ) =>
+    fetchApi('/cart/sync/', {
+      method: 'PUT',
+      body: { mode, items },
+      requiresAuth: true,
+    }),
+
   clear: () =>
     fetchApi('/cart/clear/', {
       method: 'POST',
@@ -314,6 +403,59 @@ export const cartApi = {
     }),
 };
 
+// ============================================
+// ANALYTICS API (admin)
+// ============================================
+
+type AnalyticsParams = Record<string, string>;
+
+const analyticsQuery = (params?: AnalyticsParams) => {
+  const query = new URLSearchParams(params).toString();
+  return query ? `?${query}` : '';
+};
+
+export const analyticsApi = {
+  getSummary: (params?: AnalyticsParams) =>
+    fetchApi(`/admin/analytics/${analyticsQuery(params)}`, { requiresAuth: true }),
+
+  getRevenue: (params?: AnalyticsParams) =>
+    fetchApi(`/admin/analytics/revenue/${analyticsQuery(params)}`, { requiresAuth: true }),
+
+  getTopProducts: (params?: AnalyticsParams) =>
+    fetchApi(`/admin/analytics/top-products/${analyticsQuery(params)}`, { requiresAuth: true }),
+
+  getTopCategories: (params?: AnalyticsParams) =>
+    fetchApi(`/admin/analytics/top-categories/${analyticsQuery(params)}`, { requiresAuth: true }),
+};
+
+// ============================================
+// EXPORTS API (admin)
+// ============================================
+
+type ExportDataset = 'orders' | 'order-items' | 'stock-movements';
+
+export const exportsApi = {
+  // Streamed CSV/JSONL file (params: output, date_from, date_to, status, type)
+  download: async (dataset: ExportDataset, params?: Record<string, string>): Promise<Blob> => {
+    const response = await fetch(`${API_BASE_URL}/admin/export/${dataset}/${analyticsQuery(params)}`, {
+      headers: { Authorization: `Bearer ${TokenManager.getAccessToken()}` },
+    });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    return response.blob();
+  },
+};
+
+// ============================================
+// STOREFRONT API
+// ============================================
+
+export const storefrontApi = {
+  // categories, featured, recommended, top_selling and newest in one request
+  getHome: () => fetchApi('/storefront/home/'),
+};
+
 // ============================================
 // REVIEWS API
 // ============================================
@@ -354,4 +496,7 @@ export default {
   orders: ordersApi,
   cart: cartApi,
   reviews: reviewsApi,
+  analytics: analyticsApi,
+  exports: exportsApi,
+  storefront: storefrontApi,
 };